@@ -4,7 +4,6 @@ Environment Detector - 実行環境の検出
 WSL、Windows、Linuxなどの環境を自動検出する
 """
 import os
-import platform
 import sys
 from typing import Literal, Dict, Any
 
@@ -32,14 +31,14 @@ class EnvironmentDetector:
         if cls._is_wsl():
             return "wsl"
         
-        # プラットフォーム判定
-        system = platform.system().lower()
+        # プラットフォーム判定（platform.system()はWindowsでサブプロセスを起動するためsys.platformを使用）
+        p = sys.platform
         
-        if system == "windows":
+        if p.startswith("win"):
             return "windows"
-        elif system == "linux":
+        elif p.startswith("linux"):
             return "linux"
-        elif system == "darwin":
+        elif p == "darwin":
             return "macos"
         else:
             return "unknown"
@@ -47,57 +46,46 @@ class EnvironmentDetector:
     @classmethod
     def _is_wsl(cls) -> bool:
         """WSL環境かどうかを判定"""
+        # WSLはLinuxカーネル上でのみ動作するため、それ以外は即座に除外
+        if sys.platform != "linux":
+            return False
+        
         # 方法1: 環境変数で判定
         if os.environ.get("WSL_DISTRO_NAME"):
             return True
         
-        # 方法2: /proc/versionの内容を確認
-        try:
-            with open("/proc/version", "r") as f:
-                version_info = f.read().lower()
-                if "microsoft" in version_info or "wsl" in version_info:
-                    return True
-        except (FileNotFoundError, PermissionError):
-            pass
+        # 方法2: カーネルリリース名を確認（os.unameはforkせずに取得できる）
+        release = os.uname().release.lower()
         
-        # 方法3: /proc/sys/kernel/osreleaseの確認
-        try:
-            with open("/proc/sys/kernel/osrelease", "r") as f:
-                osrelease = f.read().lower()
-                if "microsoft" in osrelease or "wsl" in osrelease:
-                    return True
-        except (FileNotFoundError, PermissionError):
-            pass
-        
-        # 方法4: platform.unameの結果を確認
-        try:
-            uname = platform.uname()
-            if "microsoft" in uname.release.lower() or "wsl" in uname.release.lower():
-                return True
-        except Exception:
-            pass
+        # 方法3: unameで取得できない場合のみ/proc/sys/kernel/osreleaseを確認
+        if not release:
+            try:
+                with open("/proc/sys/kernel/osrelease", "r") as f:
+                    release = f.read().lower()
+            except (FileNotFoundError, PermissionError):
+                return False
         
-        return False
+        return "microsoft" in release or "wsl" in release
     
     @classmethod
     def is_wsl(cls) -> bool:
         """WSL環境かどうかを返す"""
-        return cls.detect_environment() == "wsl"
+        return IS_WSL
     
     @classmethod
     def is_windows(cls) -> bool:
         """Windows環境かどうかを返す"""
-        return cls.detect_environment() == "windows"
+        return IS_WINDOWS
     
     @classmethod
     def is_linux(cls) -> bool:
         """Linux環境かどうかを返す"""
-        return cls.detect_environment() == "linux"
+        return IS_LINUX
     
     @classmethod
     def is_macos(cls) -> bool:
         """macOS環境かどうかを返す"""
-        return cls.detect_environment() == "macos"
+        return IS_MACOS
     
     @classmethod
     def has_japanese_font_support(cls) -> bool:
@@ -125,16 +113,36 @@ class EnvironmentDetector:
     
     @classmethod
     def get_environment_info(cls) -> Dict[str, Any]:
-        """環境情報を取得"""
-        environment = cls.detect_environment()
+        """環境情報を取得（初回のみ収集し、以降はキャッシュのコピーを返す）"""
+        if "environment_info" not in cls._cache:
+            cls._cache["environment_info"] = cls._collect_environment_info()
+        return dict(cls._cache["environment_info"])
+    
+    @classmethod
+    def _collect_environment_info(cls) -> Dict[str, Any]:
+        """環境情報の実際の収集処理"""
+        if hasattr(os, "uname"):
+            # POSIX: os.unameで一括取得（サブプロセスや/proc/cpuinfoの読み込みを避ける）
+            u = os.uname()
+            system, release, version, machine = u.sysname, u.release, u.version, u.machine
+            platform_name = f"{system}-{release}-{machine}"
+            processor = machine
+        else:
+            # Windows: os.unameが存在しないためplatformモジュールを使用
+            import platform
+            uname = platform.uname()
+            system, release, version, machine = uname.system, uname.release, uname.version, uname.machine
+            platform_name = platform.platform()
+            processor = uname.processor
+        
         return {
-            "environment": environment,
-            "platform": platform.platform(),
-            "system": platform.system(),
-            "release": platform.release(),
-            "version": platform.version(),
-            "machine": platform.machine(),
-            "processor": platform.processor(),
+            "environment": cls.detect_environment(),
+            "platform": platform_name,
+            "system": system,
+            "release": release,
+            "version": version,
+            "machine": machine,
+            "processor": processor,
             "python_version": sys.version,
             "has_japanese_font": cls.has_japanese_font_support(),
             "is_wsl": cls.is_wsl(),
@@ -143,7 +151,12 @@ class EnvironmentDetector:
     
     @classmethod
     def get_recommended_language(cls) -> Literal["ja", "en"]:
-        """推奨言語を取得"""
+        """推奨言語を取得（起動時に判定した結果を返す）"""
+        return _RECOMMENDED_LANG
+    
+    @classmethod
+    def _get_recommended_language_impl(cls) -> Literal["ja", "en"]:
+        """推奨言語の実際の判定処理"""
         # 日本語フォントサポートがない場合は英語を推奨
         if not cls.has_japanese_font_support():
             return "en"
@@ -165,6 +178,15 @@ class EnvironmentDetector:
         # デフォルトは英語
         return "en"
 
+
+# 実行環境はプロセス中に変化しないため、モジュール読み込み時に一度だけ判定する
+_ENV: EnvironmentType = EnvironmentDetector.detect_environment()
+IS_WSL: bool = _ENV == "wsl"
+IS_WINDOWS: bool = _ENV == "windows"
+IS_LINUX: bool = _ENV == "linux"
+IS_MACOS: bool = _ENV == "macos"
+_RECOMMENDED_LANG: Literal["ja", "en"] = EnvironmentDetector._get_recommended_language_impl()
+
 if __name__ == "__main__":
     # テスト実行
     detector = EnvironmentDetector()
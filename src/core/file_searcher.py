@@ -2,18 +2,71 @@
 """
 File Searcher - @ file search functionality
 """
+import heapq
 import os
 import re
+from functools import lru_cache
 from typing import List, Dict, Tuple, Optional
 from src.core.workspace_manager import WorkspaceManager
 
 
+# ソースファイル（最高優先度）
+_SOURCE_EXTENSIONS = frozenset({
+    '.py', '.cpp', '.c', '.h', '.hpp', '.cxx', '.hxx',
+    '.cs', '.java', '.js', '.ts', '.jsx', '.tsx',
+    '.go', '.rs', '.php', '.rb', '.swift', '.kt',
+    '.html', '.css', '.scss', '.sass', '.vue'
+})
+
+# 設定・データファイル（高優先度）
+_CONFIG_EXTENSIONS = frozenset({
+    '.json', '.yaml', '.yml', '.xml', '.toml',
+    '.ini', '.conf', '.cfg', '.config', '.csv', '.txt', '.md', '.rst'
+})
+
+# 画像ファイル（低優先度）
+_IMAGE_EXTENSIONS = frozenset({
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.tif',
+    '.webp', '.svg', '.ico', '.psd', '.ai', '.eps'
+})
+
+# メディアファイル（最低優先度）
+_MEDIA_EXTENSIONS = frozenset({
+    '.wav', '.mp3', '.flac', '.aac', '.ogg', '.wma',
+    '.m4a', '.opus', '.aiff', '.au', '.mp4', '.avi',
+    '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v',
+    '.3gp', '.ogv'
+})
+
+# プレビュー読み込み時の最大バイト数
+_PREVIEW_BYTE_BUDGET = 8192
+
+# プロンプトに展開できるファイルの最大サイズ（1MB）
+_MAX_INLINE_FILE_SIZE = 1024 * 1024
+
+# 検索結果キャッシュの最大エントリ数
+_RESOLVE_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=256)
+def _word_boundary_re(query_lower: str) -> "re.Pattern[str]":
+    """単語境界での一致判定用の正規表現を取得（クエリ単位でキャッシュ）"""
+    return re.compile(r'\b' + re.escape(query_lower))
+
+
 class FileSearcher:
     """ファイル検索機能を提供するクラス"""
     
+    # @ファイル名の抽出パターン
+    _MENTION_RE = re.compile(r'@([^\s@]+)')
+    
     def __init__(self, workspace_manager: WorkspaceManager):
         self.workspace_manager = workspace_manager
         self.max_results = 10
+        # このスコア未満の候補は結果から除外
+        self.min_score = 10
+        # 検索結果キャッシュ {(workspace_version, query): results}
+        self._resolve_cache: Dict[Tuple[int, str], List[Dict[str, str]]] = {}
     
     def extract_file_mentions(self, text: str) -> List[Tuple[int, int, str]]:
         """
@@ -21,9 +74,8 @@ class FileSearcher:
         Returns: [(start_pos, end_pos, filename), ...]
         """
         mentions = []
-        pattern = r'@([^\s@]+)'
         
-        for match in re.finditer(pattern, text):
+        for match in self._MENTION_RE.finditer(text):
             start_pos = match.start()
             end_pos = match.end()
             filename = match.group(1)
@@ -38,27 +90,64 @@ class FileSearcher:
         if not query:
             return []
         
+        # ワークスペース構成や検索対象が変わっていなければ前回の結果を再利用
+        # （ディスク上の変更の確認は一定間隔ごとに1回だけ行われ、変更があればversionが進む）
+        self.workspace_manager.refresh_trigram_index()
+        cache_key = (self.workspace_manager.get_search_version(), query)
+        cached = self._resolve_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
         # Search for both files and folders matching the query
         results = self.workspace_manager.search_files_and_folders(query)
         
         # Score the results
-        scored_results = []
-        for item_info in results:
-            score = self._calculate_relevance_score(query, item_info)
-            scored_results.append((score, item_info))
+        scored_results = self._score_all(query, results)
+        
+        # 上位結果のみを部分選択（全件ソートは不要）
+        top_results = heapq.nlargest(self.max_results, scored_results, key=lambda x: x[0])
+        matches = [result[1] for result in top_results]
         
-        # Sort by score (folders get slight priority boost)
-        scored_results.sort(key=lambda x: x[0], reverse=True)
+        # キャッシュが上限に達したら全体を破棄
+        if len(self._resolve_cache) >= _RESOLVE_CACHE_SIZE:
+            self._resolve_cache.clear()
+        self._resolve_cache[cache_key] = matches
         
         # 上位結果を返す
-        return [result[1] for result in scored_results[:self.max_results]]
+        return list(matches)
+    
+    def _score_all(self, query: str, items: List[Dict[str, str]]) -> List[Tuple[float, Dict[str, str]]]:
+        """候補全体のスコアを計算（クエリ依存の前処理はループ外で1回だけ行う）"""
+        query_lower = query.lower()
+        boundary_re = _word_boundary_re(query_lower)
+        min_score = self.min_score
+        
+        scored_results = []
+        for item_info in items:
+            item_name = item_info['name'].lower()
+            relative_path = item_info['relative_path'].lower()
+            
+            # 名前にもパスにも含まれない候補はスコア計算自体を省略
+            if query_lower not in item_name and query_lower not in relative_path:
+                continue
+            
+            score = self._score_item(query_lower, boundary_re, item_info, item_name, relative_path)
+            if score >= min_score:
+                scored_results.append((score, item_info))
+        
+        return scored_results
     
     def _calculate_relevance_score(self, query: str, item_info: Dict[str, str]) -> float:
         """ファイル・フォルダの関連性スコアを計算"""
-        score = 0.0
         query_lower = query.lower()
-        item_name = item_info['name'].lower()
-        relative_path = item_info['relative_path'].lower()
+        return self._score_item(query_lower, _word_boundary_re(query_lower), item_info,
+                                item_info['name'].lower(), item_info['relative_path'].lower())
+    
+    @staticmethod
+    def _score_item(query_lower: str, boundary_re: "re.Pattern[str]", item_info: Dict[str, str],
+                    item_name: str, relative_path: str) -> float:
+        """前処理済みのクエリ・名前・パスで1件分のスコアを計算"""
+        score = 0.0
         item_type = item_info.get('type', 'file')
         
         # フォルダの場合は少しボーナス点を与える
@@ -67,56 +156,26 @@ class FileSearcher:
         
         # ファイルタイプによる基本スコア調整
         if item_type == 'file':
-            file_ext = os.path.splitext(item_info['name'])[1].lower()
-            
-            # ソースファイル（最高優先度）
-            source_extensions = {
-                '.py', '.cpp', '.c', '.h', '.hpp', '.cxx', '.hxx',
-                '.cs', '.java', '.js', '.ts', '.jsx', '.tsx',
-                '.go', '.rs', '.php', '.rb', '.swift', '.kt',
-                '.html', '.css', '.scss', '.sass', '.vue'
-            }
-            
-            # 設定・データファイル（高優先度）
-            config_extensions = {
-                '.json', '.yaml', '.yml', '.xml', '.toml',
-                '.ini', '.conf', '.cfg', '.config', '.csv', '.txt', '.md', '.rst'
-            }
-            
-            # 画像ファイル（低優先度）
-            image_extensions = {
-                '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.tif',
-                '.webp', '.svg', '.ico', '.psd', '.ai', '.eps'
-            }
-            
-            # メディアファイル（最低優先度）
-            media_extensions = {
-                '.wav', '.mp3', '.flac', '.aac', '.ogg', '.wma',
-                '.m4a', '.opus', '.aiff', '.au', '.mp4', '.avi',
-                '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v',
-                '.3gp', '.ogv'
-            }
+            name_without_ext, file_ext = os.path.splitext(item_name)
             
             # ファイルタイプに基づく基本スコア
-            if file_ext in source_extensions:
+            if file_ext in _SOURCE_EXTENSIONS:
                 score += 20  # ソースファイルに最高優先度
-            elif file_ext in config_extensions:
+            elif file_ext in _CONFIG_EXTENSIONS:
                 score += 10  # 設定ファイルに高優先度
-            elif file_ext in image_extensions:
+            elif file_ext in _IMAGE_EXTENSIONS:
                 score -= 20  # 画像ファイルは低優先度
-            elif file_ext in media_extensions:
+            elif file_ext in _MEDIA_EXTENSIONS:
                 score -= 40  # メディアファイルは最低優先度
+            
+            # 拡張子なしでの一致
+            if query_lower == name_without_ext:
+                score += 95
         
         # 完全一致
         if query_lower == item_name:
             score += 100
         
-        # ファイルの場合は拡張子なしでの一致もチェック
-        if item_type == 'file':
-            name_without_ext = os.path.splitext(item_name)[0]
-            if query_lower == name_without_ext:
-                score += 95
-        
         # 名前の開始位置での一致
         if item_name.startswith(query_lower):
             score += 80
@@ -130,26 +189,43 @@ class FileSearcher:
             score += 40
         
         # 部分一致（単語境界）
-        if re.search(r'\b' + re.escape(query_lower), item_name):
+        if boundary_re.search(item_name):
             score += 30
         
-        # 深さによる調整（浅い方が高スコア）
+        # 名前の末尾での一致
+        if item_name.endswith(query_lower):
+            score += 70
+        
+        # パスの末尾での一致（例: "tarko/agent" でディレクトリ自体を上位に）
+        if relative_path.endswith(query_lower):
+            score += 60
+        
+        # パス形式のクエリではフォルダを優先
+        if item_type == 'folder' and '/' in query_lower:
+            score += 50
+        
+        # 深さによる調整（浅い方が高スコア、深い階層ほど減点を強める）
         depth = relative_path.count('/')
-        score -= depth * 5
+        score -= depth * 3 + max(0, depth - 3) * 10
         
         return score
     
     def get_file_content_preview(self, file_path: str, max_lines: int = 10) -> str:
         """ファイルの内容のプレビューを取得"""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = []
-                for i, line in enumerate(f):
-                    if i >= max_lines:
-                        lines.append("...")
-                        break
-                    lines.append(line.rstrip())
-                return '\n'.join(lines)
+            # 改行のない巨大ファイルでも読み込み量が一定になるようバイト数で上限を設ける
+            with open(file_path, 'rb') as f:
+                # 1バイト多く読み、上限を超える内容があるかを判定する
+                data = f.read(_PREVIEW_BYTE_BUDGET + 1)
+            truncated = len(data) > _PREVIEW_BYTE_BUDGET
+            if truncated:
+                data = data[:_PREVIEW_BYTE_BUDGET]
+            
+            all_lines = data.decode('utf-8', errors='ignore').splitlines()
+            lines = [line.rstrip() for line in all_lines[:max_lines]]
+            if len(all_lines) > max_lines or truncated:
+                lines.append("...")
+            return '\n'.join(lines)
         except Exception as e:
             return f"ファイル読み込みエラー: {e}"
     
@@ -175,21 +251,39 @@ class FileSearcher:
         """
         mentions = self.extract_file_mentions(text)
         
-        # 後ろから置換（位置がずれないように）
-        for start_pos, end_pos, filename in reversed(mentions):
-            if filename in selected_files:
-                file_path = selected_files[filename]
+        # 前から順に断片を集めて最後に一度だけ結合（都度の文字列再構築を避ける）
+        parts = []
+        cursor = 0
+        # 同じファイルへの複数の@参照は1回だけ読み込む
+        replacements: Dict[str, str] = {}
+        
+        for start_pos, end_pos, filename in mentions:
+            if filename not in selected_files:
+                continue
+            
+            file_path = selected_files[filename]
+            replacement = replacements.get(file_path)
+            if replacement is None:
                 try:
+                    # 巨大ファイルをプロンプトに展開しないようサイズを確認
+                    file_size = os.path.getsize(file_path)
+                    if file_size > _MAX_INLINE_FILE_SIZE:
+                        raise ValueError(f"ファイルサイズが上限を超えています ({file_size} bytes)")
+                    
                     with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                         file_content = f.read()
                     
                     replacement = f"ファイル: {os.path.basename(file_path)}\n```\n{file_content}\n```"
-                    text = text[:start_pos] + replacement + text[end_pos:]
+                    replacements[file_path] = replacement
                 except Exception as e:
                     replacement = f"[ファイル読み込みエラー: {filename} - {e}]"
-                    text = text[:start_pos] + replacement + text[end_pos:]
+            
+            parts.append(text[cursor:start_pos])
+            parts.append(replacement)
+            cursor = end_pos
         
-        return text
+        parts.append(text[cursor:])
+        return "".join(parts)
     
     def get_completion_suggestions(self, partial_filename: str) -> List[str]:
         """部分的なファイル名から補完候補を取得"""
@@ -197,16 +291,13 @@ class FileSearcher:
             return []
         
         matches = self.search_files_by_name(partial_filename)
-        suggestions = []
+        # 挿入順を保持したまま重複を除外（dictのキーを順序付き集合として使用）
+        suggestions: Dict[str, None] = {}
         
         for file_info in matches:
-            # ファイル名（拡張子なし）
-            name_without_ext = os.path.splitext(file_info['name'])[0]
-            if name_without_ext not in suggestions:
-                suggestions.append(name_without_ext)
-            
-            # ファイル名（拡張子込み）
-            if file_info['name'] not in suggestions:
-                suggestions.append(file_info['name'])
+            file_name = file_info['name']
+            # ファイル名（拡張子なし）→ ファイル名（拡張子込み）の順
+            suggestions.setdefault(os.path.splitext(file_name)[0], None)
+            suggestions.setdefault(file_name, None)
         
-        return suggestions[:5]  # 上位5件
\ No newline at end of file
+        return list(suggestions)[:5]  # 上位5件
\ No newline at end of file
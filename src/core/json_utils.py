@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+JSON Utils - JSONの読み書きヘルパー
+orjsonが利用可能な場合はそちらを使用し、未インストール時は標準のjsonモジュールで処理
+"""
+import json
+from typing import Any
+
+# orjsonは任意（未インストール時は標準のjsonモジュールを使用）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def json_loads(data: bytes) -> Any:
+    """JSONバイト列をデコード（orjsonが利用可能な場合はそちらを使用）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """オブジェクトをUTF-8のJSONバイト列にエンコード（indent=Trueで2スペースのインデント付き）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
@@ -95,13 +95,14 @@ class LanguageManager:
     def get_language_info(self) -> Dict:
         """言語情報を取得"""
         env_info = EnvironmentDetector.get_environment_info()
+        recommended_language = EnvironmentDetector.get_recommended_language()
         return {
             "current_language": self._current_language,
             "language_name": self.get_language_name(),
             "environment": env_info["environment"],
             "has_japanese_font": env_info["has_japanese_font"],
-            "recommended_language": EnvironmentDetector.get_recommended_language(),
-            "is_auto_detected": self._current_language == EnvironmentDetector.get_recommended_language()
+            "recommended_language": recommended_language,
+            "is_auto_detected": self._current_language == recommended_language
         }
 
 # グローバルインスタンス（シングルトンパターン）
@@ -117,7 +118,17 @@ def get_language_manager(settings_manager=None) -> LanguageManager:
 def set_language_manager(language_manager: LanguageManager):
     """LanguageManagerのグローバルインスタンスを設定"""
     global _language_manager_instance
+    old_instance = _language_manager_instance
     _language_manager_instance = language_manager
+    
+    # 旧インスタンスに登録済みのコールバックを引き継ぎ、言語が変わる場合は通知
+    if old_instance is not None and old_instance is not language_manager:
+        for callback_id, callback in old_instance._language_change_callbacks.items():
+            language_manager._language_change_callbacks.setdefault(callback_id, callback)
+        old_language = old_instance.get_current_language()
+        new_language = language_manager.get_current_language()
+        if old_language != new_language:
+            language_manager._notify_language_change(old_language, new_language)
 
 # 便利関数
 def get_current_language() -> LanguageCode:
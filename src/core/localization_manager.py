@@ -3,12 +3,14 @@
 Localization Manager - 外部ファイルベースの多言語管理システム
 JSON、CSV、YAMLファイルからローカライゼーションデータを読み込み・管理
 """
-import json
 import csv
 import os
-from typing import Dict, Any, Optional, List, Union
+import string
+import sys
+from typing import Callable, Dict, Any, Optional, List, Set, Tuple, Union
 from pathlib import Path
 from src.core.language_manager import get_language_manager, LanguageCode
+from src.core.json_utils import json_loads, json_dumps
 
 # YAML support is optional
 try:
@@ -17,6 +19,12 @@ try:
 except ImportError:
     YAML_AVAILABLE = False
 
+# プレースホルダー置換結果キャッシュの最大エントリ数
+_FORMAT_CACHE_SIZE = 512
+
+# 置換結果をキャッシュできるパラメータの型（ハッシュ可能で文字列表現が変わらないもの）
+_CACHEABLE_ARG_TYPES = (str, int, float, bool)
+
 
 class LocalizationManager:
     """外部ファイルベースの多言語管理クラス"""
@@ -40,22 +48,77 @@ class LocalizationManager:
         self._supported_languages: List[LanguageCode] = ["ja", "en"]
         self._fallback_language: LanguageCode = "en"
         
-        # ディレクトリが存在しない場合は作成
-        self.locales_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 言語データを読み込み
-        self.reload_translations()
+        # 言語ごとの検索用辞書 {lang: {key: text}}（get_stringの高速化用）
+        self._by_lang: Dict[LanguageCode, Dict[str, str]] = {}
+        self._active_lang_dict: Dict[str, str] = {}
+        self._fallback_lang_dict: Dict[str, str] = {}
+        # いずれかの言語でプレースホルダーを含むキー
+        self._is_template: Set[str] = set()
+        # プレースホルダーが1種類だけのテンプレートのフィールド名 {text: field}（それ以外はNone）
+        self._single_fields: Dict[str, Optional[str]] = {}
+        # 現在の言語で解決済みの文字列キャッシュ（言語変更・データ更新時に破棄）
+        self._cache: Dict[str, str] = {}
+        # 現在の言語でのプレースホルダー置換結果キャッシュ {(key, パラメータ): text}
+        self._format_cache: Dict[Tuple[str, Tuple[Tuple[str, type, Any], ...]], str] = {}
+        self._active_language: LanguageCode = get_language_manager().get_current_language()
+        
+        # 言語データは最初に必要になった時点で読み込む
+        self._loaded = False
+        
+        # 言語変更時に現在言語の辞書を切り替える
+        get_language_manager().register_language_change_callback(
+            "localization_manager", self._on_language_changed)
+    
+    def _on_language_changed(self, language: LanguageCode) -> None:
+        """言語変更時のコールバック"""
+        self._active_language = language
+        self._active_lang_dict = self._by_lang.get(language, {})
+        self._cache.clear()
+        self._format_cache.clear()
+    
+    def _ensure_loaded(self) -> None:
+        """翻訳データが未読み込みの場合は読み込む"""
+        if not self._loaded:
+            self.reload_translations()
+    
+    def _rebuild_index(self) -> None:
+        """翻訳データから言語ごとの検索用辞書を再構築"""
+        by_lang: Dict[LanguageCode, Dict[str, str]] = {lang: {} for lang in self._supported_languages}
+        is_template: Set[str] = set()
+        for key, translations in self._strings.items():
+            # キーと言語コードはファイルから読み込んだ文字列のためインターンしておく
+            key = sys.intern(key)
+            for lang, text in translations.items():
+                by_lang.setdefault(sys.intern(lang), {})[key] = text
+                if '{' in text or '}' in text:
+                    is_template.add(key)
+        
+        self._by_lang = by_lang
+        self._is_template = is_template
+        self._single_fields.clear()
+        self._active_lang_dict = by_lang.get(self._active_language, {})
+        self._fallback_lang_dict = by_lang.get(self._fallback_language, {})
+        self._cache.clear()
+        self._format_cache.clear()
     
     def reload_translations(self) -> None:
         """翻訳データを再読み込み"""
+        self._loaded = True
         self._strings.clear()
         
+        # ディレクトリ内のファイル名を1回の走査でまとめて取得
+        try:
+            with os.scandir(self.locales_dir) as it:
+                entries = {entry.name for entry in it if entry.is_file()}
+        except FileNotFoundError:
+            entries = set()
+        
         # サポートされているファイル形式を順次試行
         loaded = False
         
         # 1. JSON形式を試行
         json_file = self.locales_dir / "strings.json"
-        if json_file.exists():
+        if json_file.name in entries:
             try:
                 self._load_json_file(json_file)
                 loaded = True
@@ -66,7 +129,7 @@ class LocalizationManager:
         # 2. YAML形式を試行（YAMLサポートが利用可能な場合のみ）
         if not loaded and YAML_AVAILABLE:
             yaml_file = self.locales_dir / "strings.yaml"
-            if yaml_file.exists():
+            if yaml_file.name in entries:
                 try:
                     self._load_yaml_file(yaml_file)
                     loaded = True
@@ -77,7 +140,7 @@ class LocalizationManager:
         # 3. CSV形式を試行
         if not loaded:
             csv_file = self.locales_dir / "strings.csv"
-            if csv_file.exists():
+            if csv_file.name in entries:
                 try:
                     self._load_csv_file(csv_file)
                     loaded = True
@@ -89,7 +152,7 @@ class LocalizationManager:
         if not loaded:
             for lang in self._supported_languages:
                 lang_file = self.locales_dir / f"{lang}.json"
-                if lang_file.exists():
+                if lang_file.name in entries:
                     try:
                         self._load_language_file(lang_file, lang)
                         loaded = True
@@ -100,11 +163,12 @@ class LocalizationManager:
             print(f"Warning: No translation files found in {self.locales_dir}")
             # デフォルトの翻訳データを作成
             self._create_default_translations()
+        
+        self._rebuild_index()
     
     def _load_json_file(self, file_path: Path) -> None:
         """JSON形式のファイルを読み込み"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json_loads(Path(file_path).read_bytes())
         
         # データ形式検証
         if 'strings' in data:
@@ -155,8 +219,7 @@ class LocalizationManager:
     
     def _load_language_file(self, file_path: Path, language: LanguageCode) -> None:
         """個別言語ファイルを読み込み"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lang_data = json.load(f)
+        lang_data = json_loads(Path(file_path).read_bytes())
         
         # 言語データをマージ
         for key, text in lang_data.items():
@@ -194,70 +257,155 @@ class LocalizationManager:
         Returns:
             翻訳された文字列
         """
-        if language is None:
-            language = get_language_manager().get_current_language()
-        
-        # キーが存在しない場合
-        if key not in self._strings:
-            print(f"Warning: Translation key '{key}' not found")
+        # 現在の言語・プレースホルダーなしの呼び出しは解決済みの結果を再利用
+        if language is None and not kwargs:
+            text = self._cache.get(key)
+            if text is None:
+                text = self._resolve(key, None)
+                if text is None:
+                    text = key
+                self._cache[key] = text
+            return text
+        
+        # 現在の言語で同じパラメータによる置換結果を再利用
+        cache_key = None
+        if language is None and all(isinstance(v, _CACHEABLE_ARG_TYPES) for v in kwargs.values()):
+            # 1・True・1.0は等価なハッシュキーになるため型もキーに含める
+            cache_key = (key, tuple((k, type(v), v) for k, v in sorted(kwargs.items())))
+            text = self._format_cache.get(cache_key)
+            if text is not None:
+                return text
+        
+        text = self._resolve(key, language)
+        if text is None:
             return key
         
-        # 指定言語が存在しない場合、フォールバックを試行
-        if language not in self._strings[key]:
-            if self._fallback_language in self._strings[key]:
-                language = self._fallback_language
-            else:
-                print(f"Warning: No translation found for key '{key}' in language '{language}'")
-                return key
-        
-        text = self._strings[key][language]
-        
-        # プレースホルダーを置換
-        if kwargs:
+        # プレースホルダーを置換（プレースホルダーを含まない文字列は書式処理を省略）
+        if kwargs and key in self._is_template:
             try:
-                text = text.format(**kwargs)
+                # パラメータ1個で置換する場合はstr.replaceで済ませる（書式解析を省略）
+                if len(kwargs) == 1:
+                    field = self._single_field(text)
+                    if field is not None and field in kwargs:
+                        text = text.replace("{" + field + "}", str(kwargs[field]))
+                    else:
+                        text = text.format_map(kwargs)
+                else:
+                    text = text.format_map(kwargs)
             except KeyError as e:
                 print(f"Warning: Missing placeholder {e} in string '{key}'")
+                return text
+        
+        if cache_key is not None:
+            # キャッシュが上限に達したら全体を破棄
+            if len(self._format_cache) >= _FORMAT_CACHE_SIZE:
+                self._format_cache.clear()
+            self._format_cache[cache_key] = text
         
         return text
     
+    def _single_field(self, text: str) -> Optional[str]:
+        """
+        テンプレートのプレースホルダーが1種類の単純な{name}だけの場合はそのフィールド名を返す
+        
+        書式指定・変換・属性/インデックス参照・波括弧のエスケープを含むものや
+        解析できないものはNoneを返し、呼び出し側でformat_mapにフォールバックする
+        """
+        try:
+            return self._single_fields[text]
+        except KeyError:
+            pass
+        
+        result: Optional[str] = None
+        try:
+            for literal, field, format_spec, conversion in string.Formatter().parse(text):
+                if '{' in literal or '}' in literal:
+                    result = None
+                    break
+                if field is None:
+                    continue
+                if not field.isidentifier() or format_spec or conversion is not None \
+                        or (result is not None and field != result):
+                    result = None
+                    break
+                result = field
+        except ValueError:
+            result = None
+        
+        self._single_fields[text] = result
+        return result
+    
+    def _resolve(self, key: str, language: Optional[LanguageCode]) -> Optional[str]:
+        """フォールバックを考慮して翻訳文字列を解決（見つからない場合はNone）"""
+        self._ensure_loaded()
+        
+        if language is None:
+            table = self._active_lang_dict
+        else:
+            table = self._by_lang.get(language, {})
+        
+        text = table.get(key)
+        if text is None:
+            # 指定言語が存在しない場合、フォールバックを試行
+            text = self._fallback_lang_dict.get(key)
+            if text is None:
+                if key not in self._strings:
+                    print(f"Warning: Translation key '{key}' not found")
+                else:
+                    print(f"Warning: No translation found for key '{key}' in language "
+                          f"'{language or self._active_language}'")
+        return text
+    
     def add_string(self, key: str, translations: Dict[LanguageCode, str]) -> None:
         """新しい翻訳文字列を追加"""
+        self._ensure_loaded()
         self._strings[key] = translations
+        self._rebuild_index()
     
     def remove_string(self, key: str) -> None:
         """翻訳文字列を削除"""
+        self._ensure_loaded()
         if key in self._strings:
             del self._strings[key]
+            self._rebuild_index()
     
     def get_all_keys(self) -> List[str]:
         """すべての翻訳キーを取得"""
+        self._ensure_loaded()
         return list(self._strings.keys())
     
     def get_supported_languages(self) -> List[LanguageCode]:
         """サポートされている言語リストを取得"""
+        self._ensure_loaded()
         return self._supported_languages.copy()
     
     def save_to_json(self, file_path: Optional[Path] = None) -> None:
         """現在の翻訳データをJSONファイルに保存"""
+        self._ensure_loaded()
         if file_path is None:
             file_path = self.locales_dir / "strings.json"
         
+        # 保存先ディレクトリが存在しない場合は作成
+        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        
         data = {
             "languages": self._supported_languages,
             "strings": self._strings
         }
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        Path(file_path).write_bytes(json_dumps(data, indent=True))
         
         print(f"Translations saved to {file_path}")
     
     def save_to_csv(self, file_path: Optional[Path] = None) -> None:
         """現在の翻訳データをCSVファイルに保存"""
+        self._ensure_loaded()
         if file_path is None:
             file_path = self.locales_dir / "strings.csv"
         
+        # 保存先ディレクトリが存在しない場合は作成
+        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        
         with open(file_path, 'w', encoding='utf-8', newline='') as f:
             fieldnames = ['key'] + self._supported_languages
             writer = csv.DictWriter(f, fieldnames=fieldnames)
@@ -273,12 +421,16 @@ class LocalizationManager:
     
     def save_to_yaml(self, file_path: Optional[Path] = None) -> None:
         """現在の翻訳データをYAMLファイルに保存"""
+        self._ensure_loaded()
         if not YAML_AVAILABLE:
             raise ImportError("PyYAML is required for YAML support. Install with: pip install PyYAML")
         
         if file_path is None:
             file_path = self.locales_dir / "strings.yaml"
         
+        # 保存先ディレクトリが存在しない場合は作成
+        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        
         data = {
             "languages": self._supported_languages,
             "strings": self._strings
@@ -291,23 +443,26 @@ class LocalizationManager:
     
     def export_for_translation(self, language: LanguageCode, file_path: Optional[Path] = None) -> None:
         """特定言語の翻訳用ファイルをエクスポート"""
+        self._ensure_loaded()
         if file_path is None:
             file_path = self.locales_dir / f"export_{language}.json"
         
+        # 保存先ディレクトリが存在しない場合は作成
+        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        
         # 翻訳対象のキーと現在の値を抽出
         export_data = {}
         for key, translations in self._strings.items():
             export_data[key] = translations.get(language, "")
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, ensure_ascii=False, indent=2)
+        Path(file_path).write_bytes(json_dumps(export_data, indent=True))
         
         print(f"Translation export for '{language}' saved to {file_path}")
     
     def import_from_translation(self, language: LanguageCode, file_path: Path) -> None:
         """翻訳ファイルからインポート"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            import_data = json.load(f)
+        self._ensure_loaded()
+        import_data = json_loads(Path(file_path).read_bytes())
         
         # データをマージ
         for key, text in import_data.items():
@@ -315,6 +470,7 @@ class LocalizationManager:
                 self._strings[key][language] = text
             else:
                 self._strings[key] = {language: text}
+        self._rebuild_index()
         
         print(f"Translations imported from {file_path}")
 
@@ -322,6 +478,9 @@ class LocalizationManager:
 # シングルトンインスタンス用
 _localization_manager_instance: Optional[LocalizationManager] = None
 
+# シングルトン差し替え時のコールバック {callback_id: callback}
+_manager_change_callbacks: Dict[str, Callable[[LocalizationManager], None]] = {}
+
 
 def get_localization_manager() -> LocalizationManager:
     """LocalizationManagerのシングルトンインスタンスを取得"""
@@ -335,6 +494,16 @@ def set_localization_manager(manager: LocalizationManager) -> None:
     """LocalizationManagerのシングルトンインスタンスを設定"""
     global _localization_manager_instance
     _localization_manager_instance = manager
+    
+    # 参照をキャッシュしているモジュールに差し替えを通知
+    for callback in _manager_change_callbacks.values():
+        callback(manager)
+
+
+def register_localization_manager_change_callback(
+        callback_id: str, callback: Callable[[LocalizationManager], None]) -> None:
+    """シングルトンインスタンスが差し替えられた時のコールバックを登録"""
+    _manager_change_callbacks[callback_id] = callback
 
 
 # 便利関数
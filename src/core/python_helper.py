@@ -9,22 +9,38 @@ from typing import Optional, List, Dict
 from src.core.ui_strings import tr
 
 
+# WSL判定はプロセス実行中に変わらないため、インポート時に一度だけ評価する
+_IS_WSL: bool = 'WSL_DISTRO_NAME' in os.environ or 'WSL_INTEROP' in os.environ
+
+
 class PythonHelper:
     """Python実行環境のヘルパークラス"""
     
+    # 検出したPython実行可能ファイル（初回検索時に設定）
+    _executables_cache: Optional[List[Dict[str, str]]] = None
+    
     @staticmethod
     def is_wsl_environment() -> bool:
         """WSL環境かどうかを判定"""
-        return 'WSL_DISTRO_NAME' in os.environ or 'WSL_INTEROP' in os.environ
+        return _IS_WSL
     
     @staticmethod
     def find_python_executables() -> List[Dict[str, str]]:
         """
         利用可能なPython実行可能ファイルを検索
         
+        各候補のバージョン確認でサブプロセスを起動するため、結果はプロセス内でキャッシュする
+        
         Returns:
             List of dicts with 'path', 'version', 'type' keys
         """
+        if PythonHelper._executables_cache is None:
+            PythonHelper._executables_cache = PythonHelper._scan_python_executables()
+        return [dict(exe) for exe in PythonHelper._executables_cache]
+    
+    @staticmethod
+    def _scan_python_executables() -> List[Dict[str, str]]:
+        """PATHおよびWindows側のインストール先からPython実行可能ファイルを検索"""
         executables = []
         
         # Common Python executable names
@@ -75,11 +75,16 @@ class SettingsManager:
         self.settings = merge_dict(self.settings, loaded_settings)
     
     def save_settings(self) -> None:
-        """設定をファイルに保存"""
+        """
+        設定をファイルに保存
+        
+        ディスクへの書き込みはこのメソッドだけが行う（set系メソッドはメモリ上の値のみ更新）。
+        """
         try:
+            content = json.dumps(self.settings, indent=2, ensure_ascii=False)
             os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
             with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, indent=2, ensure_ascii=False)
+                f.write(content)
         except Exception as e:
             print(f"設定保存エラー: {e}")
     
@@ -4,10 +4,40 @@ Template Manager - 定型文管理システム
 プリプロンプトとポストプロンプトのテンプレート管理
 """
 import os
+import re
+import sys
 import json
+import tempfile
 import yaml
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
+from src.core.json_utils import json_loads, json_dumps
+
+# ファイル名に使用できない文字（英数字・CJK等の\w、空白、ハイフン以外）
+_UNSAFE_TITLE_RE = re.compile(r'[^\w \-]+')
+
+# libyamlが利用可能な場合はCベースのローダー・ダンパーを使用
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# 解析済みテンプレートのキャッシュファイル名（templates_dir直下）
+_INDEX_FILE_NAME = ".index.json"
+_INDEX_VERSION = 1
+
+# これ以上のファイルを解析する場合はスレッドプールを使用
+_PARALLEL_LOAD_THRESHOLD = 4
+
+
+class _TemplateRecord:
+    """テンプレート1件分の情報（タイトル、内容、定義しているファイルのパス一覧）"""
+    
+    __slots__ = ('title', 'content', 'paths')
+    
+    def __init__(self, title: str, content: str, paths: List[str]):
+        self.title = title
+        self.content = content
+        self.paths = paths
 
 
 class TemplateManager:
@@ -28,80 +58,200 @@ class TemplateManager:
             self.templates_dir = Path(templates_dir)
         
         # テンプレート格納用辞書
-        self._pre_templates: Dict[str, str] = {}
-        self._post_templates: Dict[str, str] = {}
+        self._pre_templates: Dict[str, _TemplateRecord] = {}
+        self._post_templates: Dict[str, _TemplateRecord] = {}
+        # 直前に構築したプロンプト（(pre_template, main_content, post_template), 結果）
+        self._last_prompt: Optional[Tuple[Tuple[Optional[str], str, Optional[str]], str]] = None
         
         # テンプレートディレクトリが存在しない場合は作成
         self.templates_dir.mkdir(exist_ok=True)
         (self.templates_dir / "pre").mkdir(exist_ok=True)
         (self.templates_dir / "post").mkdir(exist_ok=True)
         
-        # テンプレートを読み込み
-        self.reload_templates()
+        # テンプレートは最初に必要になった時点で読み込む
+        self._loaded = False
+    
+    def _ensure_loaded(self) -> None:
+        """テンプレートが未読み込みの場合は読み込む"""
+        if not self._loaded:
+            self.reload_templates()
     
     def reload_templates(self) -> None:
         """テンプレートを再読み込み"""
+        self._loaded = True
         self._pre_templates.clear()
         self._post_templates.clear()
+        self._last_prompt = None
+        
+        # 前回の解析結果を読み込み、更新日時・サイズが一致するファイルは再解析しない
+        index = self._read_index()
+        new_index: Dict[str, Any] = {"version": _INDEX_VERSION}
+        changed = False
+        for label, templates in (("pre", self._pre_templates), ("post", self._post_templates)):
+            section, section_changed = self._load_template_dir(
+                self.templates_dir / label, templates, label, index.get(label, {}))
+            new_index[label] = section
+            changed = changed or section_changed
+        
+        if changed or index.get("version") != _INDEX_VERSION:
+            self._write_index(new_index)
+    
+    def _load_template_dir(self, template_dir: Path, templates: Dict[str, _TemplateRecord],
+                           label: str, cached: Dict[str, list]) -> Tuple[Dict[str, list], bool]:
+        """
+        ディレクトリ内のテンプレートを読み込み
         
-        # プリプロンプトテンプレートを読み込み
-        pre_dir = self.templates_dir / "pre"
-        if pre_dir.exists():
-            # YAMLファイルを読み込み
-            for file_path in pre_dir.glob("*.yaml"):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = yaml.safe_load(f)
-                        if isinstance(data, dict) and 'title' in data and 'content' in data:
-                            self._pre_templates[data['title']] = data['content']
-                except (yaml.YAMLError, KeyError, OSError) as e:
-                    print(f"Warning: Failed to load pre-template {file_path}: {e}")
+        Args:
+            template_dir: テンプレートディレクトリ
+            templates: 読み込み先の辞書（タイトル→テンプレート情報）
+            label: 警告表示用の種別（"pre" または "post"）
+            cached: 前回の解析結果 {ファイル名: [mtime_ns, size, title, content]}
             
-            # JSONファイルも読み込み（下位互換性）
-            for file_path in pre_dir.glob("*.json"):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        if 'title' in data and 'content' in data:
-                            # YAMLファイルが既に存在する場合はスキップ
-                            yaml_path = file_path.with_suffix('.yaml')
-                            if not yaml_path.exists():
-                                self._pre_templates[data['title']] = data['content']
-                except (json.JSONDecodeError, KeyError, OSError) as e:
-                    print(f"Warning: Failed to load pre-template {file_path}: {e}")
+        Returns:
+            (今回の解析結果, 前回から変更があったか)
+        """
+        # ディレクトリを1回だけ走査し、YAMLとJSONのファイルを振り分ける
+        yaml_files: List[os.DirEntry] = []
+        json_files: Dict[str, os.DirEntry] = {}
+        try:
+            with os.scandir(template_dir) as it:
+                for entry in it:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    name = entry.name
+                    if name.endswith('.yaml'):
+                        yaml_files.append(entry)
+                    elif name.endswith('.json'):
+                        json_files[name[:-5]] = entry
+        except FileNotFoundError:
+            return {}, bool(cached)
+        
+        # YAMLファイルを優先し、同名のYAMLファイルが存在しないJSONファイルも読み込む（下位互換性）
+        yaml_stems = {entry.name[:-5] for entry in yaml_files}
+        entries = yaml_files + [entry for stem, entry in json_files.items() if stem not in yaml_stems]
+        
+        # キャッシュが有効なファイルとそうでないファイルを振り分ける
+        records: List[Tuple[os.DirEntry, Optional[list], os.stat_result]] = []
+        stale_paths: List[str] = []
+        for entry in entries:
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError as e:
+                print(f"Warning: Failed to load {label}-template {entry.path}: {e}")
+                continue
+            
+            record = cached.get(entry.name)
+            if record is None or record[0] != stat.st_mtime_ns or record[1] != stat.st_size:
+                record = None
+                stale_paths.append(entry.path)
+            records.append((entry, record, stat))
         
-        # ポストプロンプトテンプレートを読み込み
-        post_dir = self.templates_dir / "post"
-        if post_dir.exists():
-            # YAMLファイルを読み込み
-            for file_path in post_dir.glob("*.yaml"):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = yaml.safe_load(f)
-                        if isinstance(data, dict) and 'title' in data and 'content' in data:
-                            self._post_templates[data['title']] = data['content']
-                except (yaml.YAMLError, KeyError, OSError) as e:
-                    print(f"Warning: Failed to load post-template {file_path}: {e}")
+        parsed = self._parse_template_files(stale_paths)
+        
+        section: Dict[str, list] = {}
+        changed = bool(stale_paths)
+        for entry, record, stat in records:
+            if record is None:
+                result = parsed[entry.path]
+                if isinstance(result, Exception):
+                    print(f"Warning: Failed to load {label}-template {entry.path}: {result}")
+                    continue
+                title, content = result if result is not None else (None, None)
+                record = [stat.st_mtime_ns, stat.st_size, title, content]
             
-            # JSONファイルも読み込み（下位互換性）
-            for file_path in post_dir.glob("*.json"):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        if 'title' in data and 'content' in data:
-                            # YAMLファイルが既に存在する場合はスキップ
-                            yaml_path = file_path.with_suffix('.yaml')
-                            if not yaml_path.exists():
-                                self._post_templates[data['title']] = data['content']
-                except (json.JSONDecodeError, KeyError, OSError) as e:
-                    print(f"Warning: Failed to load post-template {file_path}: {e}")
+            section[entry.name] = record
+            title, content = record[2], record[3]
+            if title is not None and not isinstance(title, str):
+                # 「title: 2024」のように文字列以外のタイトルは扱えないため読み込まない
+                print(f"Warning: Failed to load {label}-template {entry.path}: title must be a string")
+                continue
+            if title is not None:
+                # 名前での検索が多いためタイトルをインターンしておく
+                title = sys.intern(title)
+                template = templates.get(title)
+                if template is None:
+                    templates[title] = _TemplateRecord(title, content, [entry.path])
+                else:
+                    # 同じタイトルのファイルが複数ある場合は後のファイルの内容を優先
+                    template.content = content
+                    template.paths.append(entry.path)
+        
+        return section, changed or section.keys() != cached.keys()
+    
+    @classmethod
+    def _parse_template_files(cls, file_paths: List[str]) -> Dict[str, Any]:
+        """
+        複数のテンプレートファイルを解析
+        
+        ファイル数が多い場合はスレッドプールで読み込み待ちを重ねる
+        
+        Returns:
+            {ファイルパス: (タイトル, 内容) / None / 発生した例外}
+        """
+        def parse(file_path: str) -> Any:
+            try:
+                return cls._parse_template_file(file_path)
+            except (yaml.YAMLError, json.JSONDecodeError, UnicodeDecodeError, OSError) as e:
+                return e
+        
+        if len(file_paths) < _PARALLEL_LOAD_THRESHOLD:
+            return {file_path: parse(file_path) for file_path in file_paths}
+        
+        max_workers = min(8, os.cpu_count() or 2)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(file_paths, executor.map(parse, file_paths)))
+    
+    @staticmethod
+    def _parse_template_file(file_path: str) -> Optional[Tuple[str, str]]:
+        """
+        テンプレートファイルを解析
+        
+        Returns:
+            (タイトル, 内容)。titleまたはcontentがない場合はNone
+        """
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        if file_path.endswith('.yaml'):
+            data = yaml.load(raw, Loader=_YAML_LOADER)
+        else:
+            data = json_loads(raw)
+        if isinstance(data, dict) and 'title' in data and 'content' in data:
+            return data['title'], data['content']
+        return None
+    
+    def _read_index(self) -> Dict[str, Any]:
+        """解析済みテンプレートのキャッシュを読み込み（存在しない・壊れている場合は空）"""
+        try:
+            with open(self.templates_dir / _INDEX_FILE_NAME, 'rb') as f:
+                index = json_loads(f.read())
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(index, dict) or index.get("version") != _INDEX_VERSION:
+            return {}
+        return index
+    
+    def _write_index(self, index: Dict[str, Any]) -> None:
+        """解析済みテンプレートのキャッシュを一時ファイル経由で書き込み"""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.templates_dir, prefix=".index.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(json_dumps(index))
+                os.replace(tmp_path, self.templates_dir / _INDEX_FILE_NAME)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            print(f"Warning: Failed to write template index: {e}")
     
     def get_pre_template_names(self) -> List[str]:
         """プリプロンプトテンプレート名一覧を取得"""
+        self._ensure_loaded()
         return sorted(self._pre_templates.keys())
     
     def get_post_template_names(self) -> List[str]:
         """ポストプロンプトテンプレート名一覧を取得"""
+        self._ensure_loaded()
         return sorted(self._post_templates.keys())
     
     def get_pre_template_content(self, name: str) -> Optional[str]:
@@ -114,7 +264,9 @@ class TemplateManager:
         Returns:
             テンプレート内容（存在しない場合はNone）
         """
-        return self._pre_templates.get(name)
+        self._ensure_loaded()
+        template = self._pre_templates.get(name)
+        return template.content if template is not None else None
     
     def get_post_template_content(self, name: str) -> Optional[str]:
         """
@@ -126,7 +278,9 @@ class TemplateManager:
         Returns:
             テンプレート内容（存在しない場合はNone）
         """
-        return self._post_templates.get(name)
+        self._ensure_loaded()
+        template = self._post_templates.get(name)
+        return template.content if template is not None else None
     
     def create_template(self, template_type: str, title: str, content: str) -> bool:
         """
@@ -140,12 +294,13 @@ class TemplateManager:
         Returns:
             作成成功可否
         """
-        if template_type not in ["pre", "post"]:
+        if template_type not in ["pre", "post"] or not isinstance(title, str):
             return False
+        self._ensure_loaded()
+        title = sys.intern(title)
         
         # ファイル名として使用できるようにタイトルをサニタイズ
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        safe_title = safe_title.replace(' ', '_')
+        safe_title = _UNSAFE_TITLE_RE.sub('', title).rstrip().replace(' ', '_')
         
         template_data = {
             "title": title,
@@ -156,15 +311,28 @@ class TemplateManager:
         file_path = template_dir / f"{safe_title}.yaml"
         
         try:
+            # 文字列にまとめてシリアライズしてから1回で書き込む
+            text = yaml.dump(template_data, Dumper=_YAML_DUMPER, default_flow_style=False,
+                             allow_unicode=True, indent=2, sort_keys=False)
             with open(file_path, 'w', encoding='utf-8') as f:
-                yaml.dump(template_data, f, default_flow_style=False, 
-                         allow_unicode=True, indent=2, sort_keys=False)
+                f.write(text)
             
             # メモリ内のテンプレートも更新
-            if template_type == "pre":
-                self._pre_templates[title] = content
+            templates = self._pre_templates if template_type == "pre" else self._post_templates
+            # サニタイズ後のファイル名が別タイトルと衝突した場合、そのファイルは上書きされたため切り離す
+            for other_title, other in list(templates.items()):
+                if other_title != title and str(file_path) in other.paths:
+                    other.paths.remove(str(file_path))
+                    if not other.paths:
+                        del templates[other_title]
+            template = templates.get(title)
+            if template is None:
+                templates[title] = _TemplateRecord(title, content, [str(file_path)])
             else:
-                self._post_templates[title] = content
+                template.content = content
+                if str(file_path) not in template.paths:
+                    template.paths.append(str(file_path))
+            self._last_prompt = None
             
             return True
         except OSError as e:
@@ -184,45 +352,28 @@ class TemplateManager:
         """
         if template_type not in ["pre", "post"]:
             return False
+        self._ensure_loaded()
+        
+        templates = self._pre_templates if template_type == "pre" else self._post_templates
         
         # メモリからも削除
-        if template_type == "pre":
-            if title in self._pre_templates:
-                del self._pre_templates[title]
-            else:
-                return False
-        else:
-            if title in self._post_templates:
-                del self._post_templates[title]
-            else:
-                return False
+        template = templates.pop(title, None)
+        if template is None:
+            return False
+        self._last_prompt = None
         
-        # ファイルを削除（YAMLファイルを優先）
-        template_dir = self.templates_dir / template_type
+        # 記録されたファイルを削除（同じタイトルのファイルが複数ある場合はすべて）
         deleted = False
-        
-        # YAMLファイルをチェック
-        for file_path in template_dir.glob("*.yaml"):
+        for file_path in template.paths:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
-                    if isinstance(data, dict) and data.get('title') == title:
-                        file_path.unlink()
-                        deleted = True
-            except (yaml.YAMLError, KeyError, OSError):
-                continue
-        
-        # JSONファイルもチェック（YAMLが見つからなかった場合）
-        if not deleted:
-            for file_path in template_dir.glob("*.json"):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        if data.get('title') == title:
-                            file_path.unlink()
-                            deleted = True
-                except (json.JSONDecodeError, KeyError, OSError):
+                # 外部で書き換えられた別タイトルのファイルは削除しない
+                parsed = self._parse_template_file(file_path)
+                if parsed is None or parsed[0] != title:
                     continue
+                os.unlink(file_path)
+                deleted = True
+            except (yaml.YAMLError, json.JSONDecodeError, UnicodeDecodeError, OSError):
+                continue
         
         return deleted
     
@@ -239,26 +390,17 @@ class TemplateManager:
         Returns:
             構築されたプロンプト
         """
-        parts = []
-
-        # プリプロンプトを追加
-        if pre_template:
-            pre_content = self.get_pre_template_content(pre_template)
-            if pre_content:
-                parts.append(pre_content)
-        
-        # メインコンテンツを追加
-        if main_content.strip():
-            parts.append(main_content.strip())
-        
-        # ポストプロンプトを追加
-        if post_template:
-            post_content = self.get_post_template_content(post_template)
-            if post_content:
-                parts.append(post_content)
+        # プレビュー更新などで同じ入力が続く場合は前回の結果を再利用
+        key = (pre_template, main_content, post_template)
+        if self._last_prompt is not None and self._last_prompt[0] == key:
+            return self._last_prompt[1]
         
-        # 空行で結合
-        return "\n\n".join(parts)
+        # プリプロンプト・メインコンテンツ・ポストプロンプトのうち空でないものを空行で結合
+        pre_content = self.get_pre_template_content(pre_template) if pre_template else None
+        post_content = self.get_post_template_content(post_template) if post_template else None
+        result = "\n\n".join(filter(None, (pre_content, main_content.strip(), post_content)))
+        self._last_prompt = (key, result)
+        return result
     
     def get_templates_directory(self) -> Path:
         """テンプレートディレクトリのパスを取得"""
@@ -5,38 +5,57 @@ UI Strings (New) - 外部ファイルベースの多言語対応
 """
 from typing import Dict, Any, Optional
 from src.core.language_manager import get_language_manager, LanguageCode
-from src.core.localization_manager import get_localization_manager
+from src.core.localization_manager import (
+    LocalizationManager, get_localization_manager, register_localization_manager_change_callback
+)
 
 
-class UIStrings:
-    """UI文字列管理クラス（外部ファイルベース）"""
+# LocalizationManagerへの参照（初回使用時に取得、set_localization_managerで更新）
+_localization_manager: Optional[LocalizationManager] = None
+
+
+def _get_localization_manager() -> LocalizationManager:
+    """キャッシュしたLocalizationManagerを取得"""
+    global _localization_manager
+    if _localization_manager is None:
+        _localization_manager = get_localization_manager()
+    return _localization_manager
 
-    @classmethod
-    def get(cls, key: str, **kwargs) -> str:
-        """
-        文字列を取得（LocalizationManagerに委譲）
 
-        Args:
-            key: 文字列キー
-            **kwargs: プレースホルダー置換用パラメータ
+def _on_localization_manager_changed(manager: LocalizationManager) -> None:
+    """LocalizationManagerが差し替えられた時にキャッシュした参照を更新"""
+    global _localization_manager
+    _localization_manager = manager
 
-        Returns:
-            翻訳された文字列
-        """
-        return get_localization_manager().get_string(key, **kwargs)
+
+register_localization_manager_change_callback("ui_strings", _on_localization_manager_changed)
 
 
-# 便利関数
 def tr(key: str, **kwargs) -> str:
-    """文字列翻訳の便利関数"""
-    return UIStrings.get(key, **kwargs)
+    """
+    文字列を取得（LocalizationManagerに委譲）
+
+    Args:
+        key: 文字列キー
+        **kwargs: プレースホルダー置換用パラメータ
+
+    Returns:
+        翻訳された文字列
+    """
+    return _get_localization_manager().get_string(key, **kwargs)
+
+
+class UIStrings:
+    """UI文字列管理クラス（外部ファイルベース、互換性のためtrへの別名を提供）"""
+
+    get = staticmethod(tr)
 
 
 # 下位互換性のため旧インターフェースも保持
 def get_ui_string(key: str, language: Optional[LanguageCode] = None, **kwargs) -> str:
     """下位互換性用の関数"""
     if language:
-        return get_localization_manager().get_string(key, language, **kwargs)
+        return _get_localization_manager().get_string(key, language, **kwargs)
     else:
         return tr(key, **kwargs)
 
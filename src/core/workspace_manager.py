@@ -3,14 +3,79 @@
 Workspace Manager - VSCode-like workspace functionality
 """
 import os
-import json
-from typing import List, Dict, Optional, TYPE_CHECKING
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, NamedTuple, Optional, Set, Tuple, TYPE_CHECKING
 from pathlib import Path
 from src.core.logger import get_logger
+from src.core.json_utils import json_loads, json_dumps
 
 if TYPE_CHECKING:
     from src.core.sqlite_indexer import SQLiteIndexer
 
+class _IndexEntry(NamedTuple):
+    """トライグラム索引に保持するエントリ（dictより省メモリ）"""
+    name: str
+    path: str
+    relative_path: str
+    workspace: str
+    type: str
+
+
+# Default extensions for programming files
+_DEFAULT_FILE_EXTENSIONS = frozenset({
+    # Programming languages (highest priority)
+    '.py', '.cpp', '.c', '.h', '.hpp', '.cxx', '.hxx',
+    '.cs', '.java', '.js', '.ts', '.jsx', '.tsx',
+    '.go', '.rs', '.php', '.rb', '.swift', '.kt',
+
+    # Unreal Engine files
+    '.uproject', '.uplugin', '.uasset', '.umap', '.ucpp',
+    '.build', '.target', '.ini', '.cfg', '.config',
+
+    # Config and data files
+    '.json', '.yaml', '.yml', '.xml', '.toml',
+    '.ini', '.conf', '.csv', '.txt', '.md', '.rst',
+
+    # Build files
+    '.cmake', '.make', '.gradle', '.sln', '.vcxproj',
+    '.pro', '.pri', '.qmake',
+
+    # Shaders
+    '.hlsl', '.glsl', '.shader', '.cginc', '.compute',
+
+    # Image files (lower priority for autocomplete)
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.tif',
+    '.webp', '.svg', '.ico', '.psd', '.ai', '.eps',
+
+    # Audio files (lower priority for autocomplete)
+    '.wav', '.mp3', '.flac', '.aac', '.ogg', '.wma',
+    '.m4a', '.opus', '.aiff', '.au',
+
+    # Video files (lower priority for autocomplete)
+    '.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv',
+    '.webm', '.m4v', '.3gp', '.ogv'
+})
+
+# str.endswith()用の拡張子タプル（ファイルごとのos.path.splitextを省略）
+_DEFAULT_EXTENSION_SUFFIXES = tuple(sorted(_DEFAULT_FILE_EXTENSIONS))
+
+# 拡張子に関係なく常に含めるファイル（小文字化したファイル名のどこかに一致）
+_IMPORTANT_FILE_RE = re.compile(
+    r'readme|license|changelog|makefile|dockerfile|cmakelist|requirements|package'
+    r'|gulpfile|gruntfile|webpack|tsconfig|jsconfig'
+)
+
+# 走査から除外するビルド・キャッシュ用ディレクトリ（隠しディレクトリは別途除外）
+_EXCLUDED_DIRS = frozenset({
+    'node_modules', '__pycache__', 'Binaries', 'Intermediate',
+    'Saved', 'DerivedDataCache', '.vs', 'obj', 'bin'
+})
+
+# トライグラム索引についてディスク上の変更を確認する最短間隔（秒）
+_TRIGRAM_CHECK_INTERVAL = 1.0
+
 
 class WorkspaceManager:
     """Workspace (project folder) management class"""
@@ -18,27 +83,39 @@ class WorkspaceManager:
     def __init__(self, config_file: str = "saved/workspace.json", sqlite_indexer: Optional['SQLiteIndexer'] = None):
         self.config_file = config_file
         self.workspaces: List[Dict[str, str]] = []
+        # 登録済みワークスペースパスの集合（重複チェック用）
+        self._path_index: Set[str] = set()
         self.logger = get_logger(__name__)
         self.sqlite_indexer = sqlite_indexer  # SQLiteIndexerへの参照
+        # ワークスペース構成や検索対象の内容が変わるたびに増加（検索結果キャッシュの無効化に使用）
+        self.version = 0
+        # フォールバック検索用のトライグラム索引
+        # (version, エントリ一覧, {trigram: エントリID集合}, {走査したディレクトリ: st_mtime_ns})
+        self._trigram_index: Optional[Tuple[int, List[_IndexEntry], Dict[str, Set[int]], Dict[str, Optional[int]]]] = None
+        # トライグラム索引のディレクトリ変更を最後に確認した時刻（time.monotonic）
+        self._trigram_checked_at = 0.0
+        # ディレクトリごとの一覧キャッシュ {ディレクトリパス: (st_mtime_ns, エントリ一覧)}
+        self._dir_cache: Dict[str, Tuple[int, List[os.DirEntry]]] = {}
         self.load_workspaces()
     
     def load_workspaces(self) -> None:
         """Load saved workspace information"""
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(self.config_file, 'rb') as f:
+                    data = json_loads(f.read())
                     self.workspaces = data.get('workspaces', [])
         except Exception as e:
             self.logger.error(f"Workspace loading error ({self.config_file}): {e}")
             self.workspaces = []
+        self._path_index = {workspace['path'] for workspace in self.workspaces}
     
     def save_workspaces(self) -> None:
         """Save workspace information"""
         try:
             os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump({'workspaces': self.workspaces}, f, indent=2, ensure_ascii=False)
+            with open(self.config_file, 'wb') as f:
+                f.write(json_dumps({'workspaces': self.workspaces}, indent=True))
         except Exception as e:
             self.logger.error(f"Workspace saving error ({self.config_file}): {e}")
     
@@ -50,9 +127,8 @@ class WorkspaceManager:
         path = os.path.abspath(path)
         
         # Check if already exists
-        for workspace in self.workspaces:
-            if workspace['path'] == path:
-                return False
+        if path in self._path_index:
+            return False
         
         if name is None:
             name = os.path.basename(path)
@@ -61,6 +137,9 @@ class WorkspaceManager:
             'name': name,
             'path': path
         })
+        self._path_index.add(path)
+        # 追加したワークスペースがキャッシュ済みの一覧・索引に含まれるよう破棄（versionも進む）
+        self.invalidate_cache()
         
         self.save_workspaces()
         return True
@@ -68,9 +147,13 @@ class WorkspaceManager:
     def remove_workspace(self, path: str) -> bool:
         """Remove workspace"""
         path = os.path.abspath(path)
+        if path not in self._path_index:
+            return False
         for i, workspace in enumerate(self.workspaces):
             if workspace['path'] == path:
                 del self.workspaces[i]
+                self._path_index.discard(path)
+                self.invalidate_cache()
                 self.save_workspaces()
                 return True
         return False
@@ -84,7 +167,7 @@ class WorkspaceManager:
         全ワークスペースから全ファイルを取得
 
         SQLiteインデックスが利用可能な場合はそれを使用し、
-        そうでない場合はフォールバックとしてos.walk()を使用
+        そうでない場合はフォールバックとしてディレクトリを直接走査
         """
         self.logger.debug(f"Getting all files from {len(self.workspaces)} workspaces")
 
@@ -102,104 +185,206 @@ class WorkspaceManager:
                 return files
 
             except Exception as e:
-                self.logger.warning(f"SQLite indexer error, falling back to os.walk(): {e}")
+                self.logger.warning(f"SQLite indexer error, falling back to directory scan: {e}")
 
-        # フォールバック: 従来のos.walk()方式
-        self.logger.debug("Using fallback os.walk() for get_all_files()")
+        # フォールバック: ディレクトリを直接走査
+        self.logger.debug("Using fallback directory scan for get_all_files()")
         return self._get_all_files_fallback(extensions)
 
-    def _get_all_files_fallback(self, extensions: Optional[List[str]] = None) -> List[Dict[str, str]]:
+    def _walk_workspace(self, workspace_path: str) -> Iterator[Tuple[os.DirEntry, str, bool]]:
         """
-        os.walk()を使用したフォールバック実装（従来の実装）
+        ワークスペース配下をos.scandirで走査
+
+        os.walk()のトップダウン順と同じ順序で、各ディレクトリのファイル、
+        続いてサブディレクトリを返す。隠しディレクトリ（.claudeを除く）と
+        除外ディレクトリには入らず、シンボリックリンク先のディレクトリも辿らない。
+
+        Yields:
+            (DirEntry, ワークスペースからの相対パス, ディレクトリかどうか)
         """
-        files = []
+        # 既知のワークスペースパスを切り取るだけで相対パスを得る（os.path.relpathを避ける）
+        if workspace_path.endswith(('/', os.sep)):
+            prefix_len = len(workspace_path)
+        else:
+            prefix_len = len(workspace_path) + 1
+
+        stack = [workspace_path]
+        while stack:
+            entries = self._list_directory(stack.pop())
+            if entries is None:
+                continue
+
+            subdirs = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if not is_dir:
+                    yield entry, entry.path[prefix_len:], False
+                elif (not entry.name.startswith('.') or entry.name == '.claude') and entry.name not in _EXCLUDED_DIRS:
+                    subdirs.append(entry)
+
+            for entry in subdirs:
+                yield entry, entry.path[prefix_len:], True
+
+            # 先頭のサブディレクトリから順に処理されるよう逆順に積む
+            stack.extend(entry.path for entry in reversed(subdirs) if not entry.is_symlink())
+
+    def _walk_workspaces(self) -> List[Tuple[Dict[str, str], List[Tuple[os.DirEntry, str, bool]]]]:
+        """
+        全ワークスペースを走査
+
+        複数のワークスペースはスレッドプールで並行に走査し、ディレクトリ読み込みの
+        待ち時間を重ねる。存在しないワークスペースは警告を出して除外する。
 
-        # Default extensions for programming files
+        Returns:
+            [(ワークスペース, _walk_workspaceの結果一覧)]（ワークスペースの登録順）
+        """
+        workspaces = []
+        for workspace in self.workspaces:
+            if os.path.exists(workspace['path']):
+                workspaces.append(workspace)
+            else:
+                self.logger.warning(f"Workspace path does not exist: {workspace['path']}")
+
+        def walk(workspace: Dict[str, str]) -> List[Tuple[os.DirEntry, str, bool]]:
+            return list(self._walk_workspace(workspace['path']))
+
+        if len(workspaces) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(workspaces), 8)) as executor:
+                results = list(executor.map(walk, workspaces))
+        else:
+            results = [walk(workspace) for workspace in workspaces]
+
+        return list(zip(workspaces, results))
+
+    def _list_directory(self, dir_path: str) -> Optional[List[os.DirEntry]]:
+        """
+        ディレクトリの一覧を取得（更新日時が変わっていなければキャッシュを再利用）
+
+        ディレクトリの更新日時はエントリの追加・削除・名前変更で更新されるため、
+        一覧の再取得が必要かどうかをstat 1回で判定できる。
+
+        Returns:
+            エントリ一覧（読み込めない場合はNone）
+        """
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            self._dir_cache.pop(dir_path, None)
+            return None
+
+        cached = self._dir_cache.get(dir_path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
+            self._dir_cache.pop(dir_path, None)
+            return None
+
+        self._dir_cache[dir_path] = (mtime_ns, entries)
+        return entries
+
+    def invalidate_cache(self) -> None:
+        """ディレクトリ一覧キャッシュとトライグラム索引を破棄（versionも進めて検索結果キャッシュを無効化）"""
+        self._dir_cache.clear()
+        self._trigram_index = None
+        self.version += 1
+
+    @staticmethod
+    def _extension_suffixes(extensions: Optional[List[str]]) -> Tuple[str, ...]:
+        """拡張子の指定をstr.endswith()用のタプルに変換（Noneの場合は既定の拡張子）"""
         if extensions is None:
-            extensions = {
-                # Programming languages (highest priority)
-                '.py', '.cpp', '.c', '.h', '.hpp', '.cxx', '.hxx',
-                '.cs', '.java', '.js', '.ts', '.jsx', '.tsx',
-                '.go', '.rs', '.php', '.rb', '.swift', '.kt',
+            return _DEFAULT_EXTENSION_SUFFIXES
+        # os.path.splitext()の拡張子は必ず'.'で始まるため、それ以外の指定は一致しない
+        return tuple(ext.lower() for ext in extensions if ext.startswith('.'))
+
+    @staticmethod
+    def _is_listed_file(file: str, suffixes: Tuple[str, ...]) -> bool:
+        """ファイル一覧・検索の対象となるファイルかどうかを判定"""
+        if file.startswith('.'):
+            return False
 
-                # Unreal Engine files
-                '.uproject', '.uplugin', '.uasset', '.umap', '.ucpp',
-                '.build', '.target', '.ini', '.cfg', '.config',
+        file_name_lower = file.lower()
 
-                # Config and data files
-                '.json', '.yaml', '.yml', '.xml', '.toml',
-                '.ini', '.conf', '.csv', '.txt', '.md', '.rst',
+        # Extension filter
+        if file_name_lower.endswith(suffixes):
+            return True
 
-                # Build files
-                '.cmake', '.make', '.gradle', '.sln', '.vcxproj',
-                '.pro', '.pri', '.qmake',
+        # Always include certain important files regardless of extension
+        return _IMPORTANT_FILE_RE.search(file_name_lower) is not None
 
-                # Shaders
-                '.hlsl', '.glsl', '.shader', '.cginc', '.compute',
+    def _collect_entries_fallback(self, extensions: Optional[List[str]] = None,
+                                  query_lower: Optional[str] = None) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+        """
+        ワークスペースを1回だけ走査してファイルとフォルダを同時に収集
 
-                # Image files (lower priority for autocomplete)
-                '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.tif',
-                '.webp', '.svg', '.ico', '.psd', '.ai', '.eps',
+        Args:
+            extensions: 対象とする拡張子（Noneの場合は既定の拡張子）
+            query_lower: 小文字化した検索文字列（指定時は名前か相対パスに含むものだけを収集）
 
-                # Audio files (lower priority for autocomplete)
-                '.wav', '.mp3', '.flac', '.aac', '.ogg', '.wma',
-                '.m4a', '.opus', '.aiff', '.au',
+        Returns:
+            (ファイル一覧, フォルダ一覧)
+        """
+        suffixes = self._extension_suffixes(extensions)
 
-                # Video files (lower priority for autocomplete)
-                '.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv',
-                '.webm', '.m4v', '.3gp', '.ogv'
-            }
+        files = []
+        folders = []
+        for workspace, walked in self._walk_workspaces():
+            for entry, relative_path, is_dir in walked:
+                name = entry.name
+                if query_lower is not None and query_lower not in name.lower() \
+                        and query_lower not in relative_path.lower():
+                    continue
+
+                if is_dir:
+                    folders.append({
+                        'name': name,
+                        'path': entry.path,
+                        'relative_path': relative_path,
+                        'workspace': workspace['name'],
+                        'type': 'folder'
+                    })
+                elif self._is_listed_file(name, suffixes):
+                    files.append({
+                        'name': name,
+                        'path': entry.path,
+                        'relative_path': relative_path,
+                        'workspace': workspace['name'],
+                        'type': 'file'
+                    })
 
-        for workspace in self.workspaces:
-            workspace_path = workspace['path']
-            self.logger.debug(f"Processing workspace: {workspace['name']} at {workspace_path}")
+        return files, folders
 
-            if not os.path.exists(workspace_path):
-                self.logger.warning(f"Workspace path does not exist: {workspace_path}")
-                continue
+    def _get_all_files_fallback(self, extensions: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """
+        ワークスペースを直接走査するフォールバック実装
+        """
+        files = []
+
+        suffixes = self._extension_suffixes(extensions)
+
+        for workspace, walked in self._walk_workspaces():
+            self.logger.debug(f"Processing workspace: {workspace['name']} at {workspace['path']}")
 
             workspace_file_count = 0
-            for root, dirs, file_list in os.walk(workspace_path):
-                # Exclude hidden directories and build/cache directories (but allow .claude)
-                dirs[:] = [d for d in dirs if (not d.startswith('.') or d == '.claude') and d not in [
-                    'node_modules', '__pycache__', 'Binaries', 'Intermediate',
-                    'Saved', 'DerivedDataCache', '.vs', 'obj', 'bin'
-                ]]
-
-                for file in file_list:
-                    if file.startswith('.'):
-                        continue
-
-                    file_path = os.path.join(root, file)
-
-                    try:
-                        relative_path = os.path.relpath(file_path, workspace_path)
-                    except (ValueError, OSError) as e:
-                        # 特殊パスエラーをスキップ
-                        self.logger.debug(f"Skipping file with invalid path: {file_path} ({e})")
-                        continue
-
-                    # Extension filter
-                    file_ext = os.path.splitext(file)[1].lower()
-
-                    # Always include certain important files regardless of extension
-                    important_files = {
-                        'readme', 'license', 'changelog', 'makefile', 'dockerfile',
-                        'cmakelist', 'cmakelists', 'requirements', 'package',
-                        'gulpfile', 'gruntfile', 'webpack', 'tsconfig', 'jsconfig'
-                    }
-
-                    file_name_lower = file.lower()
-                    is_important = any(important in file_name_lower for important in important_files)
-
-                    if file_ext in extensions or is_important:
-                        files.append({
-                            'name': file,
-                            'path': file_path,
-                            'relative_path': relative_path,
-                            'workspace': workspace['name']
-                        })
-                        workspace_file_count += 1
+            for entry, relative_path, is_dir in walked:
+                if is_dir:
+                    continue
+
+                if self._is_listed_file(entry.name, suffixes):
+                    files.append({
+                        'name': entry.name,
+                        'path': entry.path,
+                        'relative_path': relative_path,
+                        'workspace': workspace['name']
+                    })
+                    workspace_file_count += 1
 
             self.logger.debug(f"Found {workspace_file_count} files in workspace {workspace['name']}")
 
@@ -242,6 +427,15 @@ class WorkspaceManager:
             except Exception as e:
                 self.logger.warning(f"SQLite indexer search error, falling back: {e}")
 
+        # フォールバック: 既定の拡張子ではキャッシュ済みのトライグラム索引を使用
+        if extensions is None:
+            self.logger.debug("Using trigram index for search_files()")
+            results = []
+            for entry in self._search_trigram_index(query):
+                if entry.pop('type') == 'file':
+                    results.append(entry)
+            return results
+
         # フォールバック: 従来の全ファイル取得→フィルタリング方式
         self.logger.debug("Using fallback search for search_files()")
         return self._search_files_fallback(query, extensions)
@@ -262,7 +456,6 @@ class WorkspaceManager:
 
             if query_lower in file_name_lower or query_lower in relative_path_lower:
                 results.append(file_info)
-                self.logger.debug(f"File match: {file_info['name']} (workspace: {file_info['workspace']})")
 
         self.logger.debug(f"Found {len(results)} matching files (fallback)")
         return results
@@ -272,7 +465,7 @@ class WorkspaceManager:
         全ワークスペースから全フォルダを取得
 
         SQLiteインデックスが利用可能な場合はそれを使用し、
-        そうでない場合はフォールバックとしてos.walk()を使用
+        そうでない場合はフォールバックとしてディレクトリを直接走査
         """
         self.logger.debug(f"Getting all folders from {len(self.workspaces)} workspaces")
 
@@ -287,52 +480,34 @@ class WorkspaceManager:
                 return folders
 
             except Exception as e:
-                self.logger.warning(f"SQLite indexer error, falling back to os.walk(): {e}")
+                self.logger.warning(f"SQLite indexer error, falling back to directory scan: {e}")
 
-        # フォールバック: 従来のos.walk()方式
-        self.logger.debug("Using fallback os.walk() for get_all_folders()")
+        # フォールバック: ディレクトリを直接走査
+        self.logger.debug("Using fallback directory scan for get_all_folders()")
         return self._get_all_folders_fallback()
 
     def _get_all_folders_fallback(self) -> List[Dict[str, str]]:
         """
-        os.walk()を使用したフォルダ取得のフォールバック実装
+        ワークスペースを直接走査するフォルダ取得のフォールバック実装
         """
         folders = []
 
-        for workspace in self.workspaces:
-            workspace_path = workspace['path']
-            self.logger.debug(f"Processing workspace folders: {workspace['name']} at {workspace_path}")
-
-            if not os.path.exists(workspace_path):
-                self.logger.warning(f"Workspace path does not exist: {workspace_path}")
-                continue
+        for workspace, walked in self._walk_workspaces():
+            self.logger.debug(f"Processing workspace folders: {workspace['name']} at {workspace['path']}")
 
             workspace_folder_count = 0
-            for root, dirs, file_list in os.walk(workspace_path):
-                # Exclude hidden directories and build/cache directories (but allow .claude)
-                dirs[:] = [d for d in dirs if (not d.startswith('.') or d == '.claude') and d not in [
-                    'node_modules', '__pycache__', 'Binaries', 'Intermediate',
-                    'Saved', 'DerivedDataCache', '.vs', 'obj', 'bin'
-                ]]
-
-                for dir_name in dirs:
-                    dir_path = os.path.join(root, dir_name)
-
-                    try:
-                        relative_path = os.path.relpath(dir_path, workspace_path)
-                    except (ValueError, OSError) as e:
-                        # 特殊パスエラーをスキップ
-                        self.logger.debug(f"Skipping folder with invalid path: {dir_path} ({e})")
-                        continue
-
-                    folders.append({
-                        'name': dir_name,
-                        'path': dir_path,
-                        'relative_path': relative_path,
-                        'workspace': workspace['name'],
-                        'type': 'folder'
-                    })
-                    workspace_folder_count += 1
+            for entry, relative_path, is_dir in walked:
+                if not is_dir:
+                    continue
+
+                folders.append({
+                    'name': entry.name,
+                    'path': entry.path,
+                    'relative_path': relative_path,
+                    'workspace': workspace['name'],
+                    'type': 'folder'
+                })
+                workspace_folder_count += 1
 
             self.logger.debug(f"Found {workspace_folder_count} folders in workspace {workspace['name']}")
 
@@ -377,30 +552,9 @@ class WorkspaceManager:
                 self.logger.warning(f"SQLite indexer search error, falling back: {e}")
 
         # フォールバック: 従来の全フォルダ取得→フィルタリング方式
-        self.logger.debug("Using fallback search for search_folders()")
-        return self._search_folders_fallback(query)
-
-    def _search_folders_fallback(self, query: str) -> List[Dict[str, str]]:
-        """
-        従来のフォルダ検索実装（全フォルダ取得→フィルタリング）
-        """
-        all_folders = self._get_all_folders_fallback()
-        self.logger.debug(f"Searching in {len(all_folders)} folders (fallback)")
-
-        query_lower = query.lower()
-
-        results = []
-        for folder_info in all_folders:
-            folder_name_lower = folder_info['name'].lower()
-            relative_path_lower = folder_info['relative_path'].lower()
-
-            if query_lower in folder_name_lower or query_lower in relative_path_lower:
-                results.append(folder_info)
-                self.logger.debug(f"Folder match: {folder_info['name']} (workspace: {folder_info['workspace']})")
+        self.logger.debug("Using trigram index for search_folders()")
+        return [entry for entry in self._search_trigram_index(query) if entry['type'] == 'folder']
 
-        self.logger.debug(f"Found {len(results)} matching folders (fallback)")
-        return results
-    
     def search_files_and_folders(self, query: str, extensions: Optional[List[str]] = None) -> List[Dict[str, str]]:
         """
         ファイルとフォルダを両方検索
@@ -439,17 +593,131 @@ class WorkspaceManager:
             except Exception as e:
                 self.logger.warning(f"SQLite indexer search error, falling back: {e}")
 
-        # フォールバック: 従来の個別検索方式
-        self.logger.debug("Using fallback search for search_files_and_folders()")
-        files = self._search_files_fallback(query, extensions)
-        folders = self._search_folders_fallback(query)
-
-        # Add type information to files
-        for file_info in files:
-            file_info['type'] = 'file'
+        # フォールバック: 既定の拡張子ではトライグラム索引で候補を絞り込む
+        if extensions is None:
+            self.logger.debug("Using trigram index for search_files_and_folders()")
+            return self._search_trigram_index(query)
 
-        # Combine results
+        # フォールバック: 1回の走査でファイルとフォルダを同時に検索
+        self.logger.debug("Using fallback search for search_files_and_folders()")
+        files, folders = self._collect_entries_fallback(extensions, query.lower())
         all_results = files + folders
 
         self.logger.debug(f"Combined search found {len(files)} files and {len(folders)} folders (fallback)")
-        return all_results
\ No newline at end of file
+        return all_results
+
+    def get_trigram_index(self) -> Tuple[List[_IndexEntry], Dict[str, Set[int]]]:
+        """
+        ファイル・フォルダの相対パスのトライグラム索引を取得
+
+        ワークスペース構成（version）と走査したディレクトリの更新日時が変わらない限り再利用する。
+        ディスク上の変更の確認はrefresh_trigram_index()で一定間隔ごとに行う。
+
+        Returns:
+            (エントリ一覧, {trigram: エントリID集合})
+        """
+        self.refresh_trigram_index()
+        if self._trigram_index is not None and self._trigram_index[0] == self.version:
+            return self._trigram_index[1], self._trigram_index[2]
+
+        suffixes = self._extension_suffixes(None)
+        files: List[_IndexEntry] = []
+        folders: List[_IndexEntry] = []
+        walked_dirs: List[str] = [workspace['path'] for workspace in self.workspaces]
+        for workspace, walked in self._walk_workspaces():
+            workspace_name = workspace['name']
+            for entry, relative_path, is_dir in walked:
+                if is_dir:
+                    folders.append(_IndexEntry(entry.name, entry.path, relative_path, workspace_name, 'folder'))
+                    if not entry.is_symlink():
+                        walked_dirs.append(entry.path)
+                elif self._is_listed_file(entry.name, suffixes):
+                    files.append(_IndexEntry(entry.name, entry.path, relative_path, workspace_name, 'file'))
+        entries = files + folders
+
+        # 走査時点の更新日時を記録（読み込めなかったディレクトリはNone）
+        dir_mtimes: Dict[str, Optional[int]] = {}
+        for dir_path in walked_dirs:
+            cached = self._dir_cache.get(dir_path)
+            dir_mtimes[dir_path] = cached[0] if cached is not None else None
+
+        postings: Dict[str, Set[int]] = {}
+        for entry_id, entry in enumerate(entries):
+            # 名前は相対パスの末尾に含まれるため、相対パスのトライグラムで両方を網羅する
+            text = entry.relative_path.lower()
+            for i in range(len(text) - 2):
+                postings.setdefault(text[i:i + 3], set()).add(entry_id)
+
+        self.logger.debug(f"Built trigram index: {len(entries)} entries, {len(postings)} trigrams")
+        self._trigram_index = (self.version, entries, postings, dir_mtimes)
+        self._trigram_checked_at = time.monotonic()
+        return entries, postings
+
+    def refresh_trigram_index(self) -> None:
+        """
+        走査したディレクトリに変更があればトライグラム索引を破棄
+
+        ディレクトリの更新日時はエントリの追加・削除・名前変更で更新されるため、これを比較する。
+        検索のたびに全ディレクトリをstatしないよう、確認は_TRIGRAM_CHECK_INTERVAL秒に1回までとする。
+        """
+        if self._trigram_index is None:
+            return
+        now = time.monotonic()
+        if now - self._trigram_checked_at < _TRIGRAM_CHECK_INTERVAL:
+            return
+        self._trigram_checked_at = now
+        if not self._directories_unchanged(self._trigram_index[3]):
+            self.logger.debug("Directory changes detected, discarding trigram index")
+            self.invalidate_trigram_index()
+
+    @staticmethod
+    def _directories_unchanged(dir_mtimes: Dict[str, Optional[int]]) -> bool:
+        """記録した各ディレクトリの更新日時が現在も同じかどうか"""
+        for dir_path, mtime_ns in dir_mtimes.items():
+            try:
+                current = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime_ns:
+                return False
+        return True
+
+    def invalidate_trigram_index(self) -> None:
+        """トライグラム索引を破棄（次回検索時に再構築、versionも進めて検索結果キャッシュを無効化）"""
+        self._trigram_index = None
+        self.version += 1
+
+    def get_search_version(self) -> int:
+        """
+        検索結果に影響する変更を反映したversionを取得（ディスクにはアクセスしない）
+
+        ディスク上の変更を反映するには、先にrefresh_trigram_index()を呼び出す。
+        """
+        return self.version
+
+    def _search_trigram_index(self, query: str) -> List[Dict[str, str]]:
+        """トライグラム索引で候補を絞り込んでから部分一致を確認"""
+        entries, postings = self.get_trigram_index()
+        query_lower = query.lower()
+
+        if len(query_lower) < 3:
+            candidate_ids = range(len(entries))
+        else:
+            trigrams = {query_lower[i:i + 3] for i in range(len(query_lower) - 2)}
+            # 件数の少ないポスティングから順に積集合を取る
+            posting_sets = sorted((postings.get(t, set()) for t in trigrams), key=len)
+            candidates = set(posting_sets[0])
+            for posting in posting_sets[1:]:
+                if not candidates:
+                    break
+                candidates &= posting
+            candidate_ids = sorted(candidates)
+
+        results = []
+        for entry_id in candidate_ids:
+            entry = entries[entry_id]
+            if query_lower in entry.name.lower() or query_lower in entry.relative_path.lower():
+                results.append(entry._asdict())
+
+        self.logger.debug(f"Trigram search found {len(results)} entries (fallback)")
+        return results
\ No newline at end of file
@@ -6,15 +6,14 @@ import os
 from typing import List, Dict
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                               QSplitter, QStatusBar, QMenuBar, QMenu, QMessageBox,
-                              QApplication, QLabel, QDialog, QScrollArea, QTextEdit,
+                              QApplication, QLabel, QDialog, QPlainTextEdit,
                               QPushButton, QDialogButtonBox, QTabWidget)
-from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QAction, QCloseEvent, QIcon, QScreen, QKeySequence, QShortcut
+from PySide6.QtCore import Qt, QTimer, Slot
+from PySide6.QtGui import QAction, QActionGroup, QCloseEvent, QIcon, QScreen, QKeySequence, QShortcut
 
 from src.core.workspace_manager import WorkspaceManager
 from src.core.settings import SettingsManager
 from src.core.logger import logger
-from src.core.python_helper import PythonHelper
 from src.core.path_converter import PathConverter
 from src.core.language_manager import get_language_manager, set_language_manager
 from src.core.ui_strings import tr
@@ -24,7 +23,6 @@ from src.widgets.file_tree import FileTreeWidget
 from src.widgets.prompt_input import PromptInputWidget
 from src.widgets.prompt_preview import PromptPreviewWidget
 from src.widgets.template_selector import TemplateSelector
-from src.widgets.prompt_history import PromptHistoryWidget
 from src.widgets.content_search_panel import ContentSearchPanel
 from src.core.template_manager import get_template_manager
 from src.ui.style_themes import apply_theme, theme_manager, get_main_font
@@ -42,23 +40,12 @@ class UsageDialog(QDialog):
         # メインレイアウト
         layout = QVBoxLayout(self)
         
-        # スクロールエリア
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        layout.addWidget(scroll_area)
-        
-        # スクロール内容のウィジェット
-        content_widget = QWidget()
-        scroll_area.setWidget(content_widget)
-        
-        # コンテンツレイアウト
-        content_layout = QVBoxLayout(content_widget)
-        
-        # テキストエディット（読み取り専用）
-        self.text_edit = QTextEdit()
+        # テキストエディット（読み取り専用、スクロールバーは自身が持つ）
+        self._usage_text = None
+        self.text_edit = QPlainTextEdit()
         self.text_edit.setReadOnly(True)
         self.text_edit.setFont(get_main_font())
-        content_layout.addWidget(self.text_edit)
+        layout.addWidget(self.text_edit)
         
         # ボタンボックス
         button_box = QDialogButtonBox(QDialogButtonBox.Ok)
@@ -66,8 +53,11 @@ class UsageDialog(QDialog):
         layout.addWidget(button_box)
     
     def set_usage_text(self, text: str):
-        """使い方テキストを設定"""
-        self.text_edit.setPlainText(text.strip())
+        """使い方テキストを設定（前回と同じ場合は再設定しない）"""
+        text = text.strip()
+        if text != self._usage_text:
+            self._usage_text = text
+            self.text_edit.setPlainText(text)
 
 
 class MainWindow(QMainWindow):
@@ -78,6 +68,11 @@ class MainWindow(QMainWindow):
         
         # 設定とマネージャー
         self.settings_manager = SettingsManager()
+        # 前回の保存以降に設定が変更されたか（自動保存の要否判定に使用）
+        self._settings_dirty = False
+        # 使い方・Python環境ダイアログ（初回表示時に作成して再利用）
+        self._usage_dialog = None
+        self._env_dialog = None
 
         # インデックス管理システム（新しい統合システム）を先に初期化
         self.indexing_manager, self.fast_searcher = create_indexing_system(self)
@@ -136,15 +131,23 @@ class MainWindow(QMainWindow):
             self.template_selector.set_selected_post_template(selected_post_template)
         
         # スプリッターサイズ変更時のシグナル接続
+        # ドラッグ中は保存せず、操作が止まってから1秒後に最新のサイズをまとめて反映する
+        self._pending_splitter_sizes = None
+        self._splitter_save_timer = QTimer(self)
+        self._splitter_save_timer.setSingleShot(True)
+        self._splitter_save_timer.setInterval(1000)
+        self._splitter_save_timer.timeout.connect(self._flush_splitter_sizes)
         self.main_splitter.splitterMoved.connect(self.on_splitter_moved)
         
         # 初期プロンプトプレビューを更新（少し遅延させる）
         self.update_prompt_preview()  # 遅延を削除
         
         # 自動保存タイマー
+        # 保存は変更時のみで精度は不要なため、CoarseTimerでOSの高精度タイマー要求を避ける
         self.auto_save_timer = QTimer()
+        self.auto_save_timer.setTimerType(Qt.CoarseTimer)
         self.auto_save_timer.timeout.connect(self.auto_save_settings)
-        self.auto_save_timer.start(30000)  # 30秒ごとに自動保存
+        self.auto_save_timer.start(60000)  # 60秒ごとに自動保存
         
         # Initialize indexing system (遅延を削除)
         self.check_indexing_needed()
@@ -369,31 +372,30 @@ class MainWindow(QMainWindow):
         view_menu.addSeparator()
         
         # テーマメニュー
-        theme_menu = view_menu.addMenu(tr("menu_theme"))
-        theme_names = theme_manager.get_theme_names()
-        theme_display_names = theme_manager.get_theme_display_names()
-        
-        for theme_name in theme_names:
-            display_name = theme_display_names.get(theme_name, theme_name)
-            theme_action = QAction(display_name, self)
-            theme_action.triggered.connect(lambda _checked=False, t=theme_name: self.change_theme(t))
-            theme_menu.addAction(theme_action)
+        # 表示名の取得に全テーマの生成が必要なため、項目は初めて開かれたときに作成する
+        self._theme_menu = view_menu.addMenu(tr("menu_theme"))
+        self._theme_menu.aboutToShow.connect(self._populate_theme_menu)
+        # 表示名は言語に依存するため、メニュー再構築（言語変更）のたびに破棄する
+        self._theme_display_names = None
         
         # 設定メニュー
         settings_menu = menubar.addMenu(tr("menu_settings"))
         
         # 言語メニュー
         language_menu = settings_menu.addMenu(tr("menu_language"))
-        
-        # 日本語
-        japanese_action = QAction(tr("menu_language_japanese"), self)
-        japanese_action.triggered.connect(lambda: self.language_manager.set_language("ja"))
-        language_menu.addAction(japanese_action)
-        
-        # 英語
-        english_action = QAction(tr("menu_language_english"), self)
-        english_action.triggered.connect(lambda: self.language_manager.set_language("en"))
-        language_menu.addAction(english_action)
+        language_group = QActionGroup(self)
+        language_group.setExclusive(True)
+        language_group.triggered.connect(self._on_language_action)
+        current_language = self.language_manager.get_current_language()
+        
+        # 日本語・英語
+        for language, label_key in (("ja", "menu_language_japanese"), ("en", "menu_language_english")):
+            language_action = QAction(tr(label_key), self)
+            language_action.setCheckable(True)
+            language_action.setChecked(language == current_language)
+            language_action.setData(language)
+            language_group.addAction(language_action)
+            language_menu.addAction(language_action)
         
         # インデックスメニュー
         index_menu = menubar.addMenu(tr("menu_index"))
@@ -439,19 +441,49 @@ class MainWindow(QMainWindow):
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
     
+    def _get_theme_display_names(self) -> Dict[str, str]:
+        """テーマの表示名を取得（現在の言語で一度だけ作成して保持）"""
+        if self._theme_display_names is None:
+            self._theme_display_names = theme_manager.get_theme_display_names()
+        return self._theme_display_names
+    
+    @Slot()
+    def _populate_theme_menu(self):
+        """テーマメニューの項目を作成（初回表示時のみ）"""
+        if not self._theme_menu.isEmpty():
+            return
+        
+        # テーマごとにクロージャを作らず、アクショングループの1つのスロットで振り分ける
+        theme_group = QActionGroup(self)
+        theme_group.setExclusive(True)
+        theme_group.triggered.connect(self._on_theme_action)
+        current_theme = self.settings_manager.get_theme()
+        theme_display_names = self._get_theme_display_names()
+        
+        for theme_name in theme_manager.get_theme_names():
+            display_name = theme_display_names.get(theme_name, theme_name)
+            theme_action = QAction(display_name, self)
+            theme_action.setCheckable(True)
+            theme_action.setChecked(theme_name == current_theme)
+            theme_action.setData(theme_name)
+            theme_group.addAction(theme_action)
+            self._theme_menu.addAction(theme_action)
+    
     def setup_status_bar(self):
         """ステータスバーの設定"""
-        self.statusBar().showMessage(tr("status_ready"))
+        # ステータスバーは頻繁に使うため参照を保持する
+        self._status_bar = self.statusBar()
+        self._status_bar.showMessage(tr("status_ready"))
         
         # 既存のpermanentウィジェットをクリア
-        self.statusBar().clearMessage()
-        for widget in self.statusBar().findChildren(QLabel):
-            self.statusBar().removeWidget(widget)
+        self._status_bar.clearMessage()
+        for widget in self._status_bar.findChildren(QLabel):
+            self._status_bar.removeWidget(widget)
             widget.deleteLater()
         
         # プログレス表示（通常は非表示）
         self.progress_label = QLabel()
-        self.statusBar().addWidget(self.progress_label)
+        self._status_bar.addWidget(self.progress_label)
         self.progress_label.hide()
         
         # インデックス構築アニメーション用
@@ -463,7 +495,7 @@ class MainWindow(QMainWindow):
         
         # インデックス状態表示
         self.index_status_label = QLabel(tr("index_status_not_built"))
-        self.statusBar().addPermanentWidget(self.index_status_label)
+        self._status_bar.addPermanentWidget(self.index_status_label)
 
         # インデックス統計を更新
         self.update_index_status()
@@ -502,11 +534,20 @@ class MainWindow(QMainWindow):
             geometry.x(), geometry.y(), geometry.width(), geometry.height()
         )
     
+    def mark_settings_dirty(self):
+        """設定が変更されたことを記録（次回の自動保存で書き込む）"""
+        self._settings_dirty = True
+    
+    @Slot()
     def auto_save_settings(self):
-        """設定の自動保存"""
+        """設定の自動保存（変更がない場合は書き込まない）"""
+        if not self._settings_dirty:
+            return
         self.save_window_geometry()
         self.settings_manager.save_settings()
+        self._settings_dirty = False
     
+    @Slot(str)
     def on_prompt_generated(self, main_content: str):
         """プロンプトが生成されたとき"""
         # テンプレートセレクターから選択された内容を取得
@@ -532,28 +573,32 @@ class MainWindow(QMainWindow):
         )
         
         # ステータス表示
-        lines = len(final_prompt.split('\n'))
+        lines = final_prompt.count('\n') + 1
         chars = len(final_prompt)
-        self.statusBar().showMessage(tr("status_prompt_copied", lines=lines, chars=chars), 3000)
+        self._status_bar.showMessage(tr("status_prompt_copied", lines=lines, chars=chars), 3000)
     
+    @Slot(str)
     def on_file_selected(self, file_path: str):
         """ファイルが選択されたとき"""
-        self.statusBar().showMessage(tr("status_file_selected", filename=os.path.basename(file_path)), 2000)
+        self._status_bar.showMessage(tr("status_file_selected", filename=os.path.basename(file_path)), 2000)
 
+    @Slot(str, int)
     def on_content_search_file_selected(self, file_path: str, line_number: int):
         """コンテンツ検索でファイルが選択されたとき"""
-        self.statusBar().showMessage(
+        self._status_bar.showMessage(
             tr("status_content_search_selected", filename=os.path.basename(file_path), line=line_number),
             2000
         )
 
+    @Slot(int, int, float)
     def on_content_search_completed(self, matches: int, files: int, time: float):
         """コンテンツ検索完了時"""
-        self.statusBar().showMessage(
+        self._status_bar.showMessage(
             tr("content_search_result_summary", matches=matches, files=files, time=f"{time:.2f}"),
             3000
         )
 
+    @Slot(str)
     def on_file_double_clicked(self, file_path: str):
         """ファイルがダブルクリックされたとき"""
         # ワークスペース相対パスを取得
@@ -584,10 +629,11 @@ class MainWindow(QMainWindow):
         
         # オートコンプリートを一時的に無効化してテキストを設定
         self.prompt_input.set_text_without_completion(new_text)
-        self.statusBar().showMessage(tr("status_file_added", filename=workspace_relative_path), 2000)
+        self._status_bar.showMessage(tr("status_file_added", filename=workspace_relative_path), 2000)
         
     
     
+    @Slot()
     def on_template_changed(self):
         """テンプレート選択変更時"""
         # 選択されたテンプレートを設定に保存
@@ -595,6 +641,7 @@ class MainWindow(QMainWindow):
         post_template = self.template_selector.get_selected_post_template()
         self.settings_manager.set_selected_pre_template(pre_template)
         self.settings_manager.set_selected_post_template(post_template)
+        self.mark_settings_dirty()
         
         # プロンプトプレビューを更新
         self.update_prompt_preview()
@@ -617,6 +664,7 @@ class MainWindow(QMainWindow):
             post_template=post_template
         )
     
+    @Slot(str)
     def on_preview_content_changed(self, full_prompt_text: str):
         """プレビュー内容変更時（トークンカウント更新）"""
         # プレビューの内容を基準にトークンカウントを更新
@@ -624,6 +672,9 @@ class MainWindow(QMainWindow):
     
     def _on_language_changed(self, language):
         """言語変更時のコールバック"""
+        # 言語設定はLanguageManagerが更新済みのため保存対象としてマーク
+        self.mark_settings_dirty()
+        
         # メニューを再構築
         self.menuBar().clear()
         self.setup_menu()
@@ -646,13 +697,21 @@ class MainWindow(QMainWindow):
         self.left_tab_widget.setTabText(1, tr("tab_content_search"))
 
         # 状態メッセージを更新
-        self.statusBar().showMessage(tr("status_language_changed", language=language), 3000)
+        self._status_bar.showMessage(tr("status_language_changed", language=language), 3000)
+    
+    def _create_or_reuse_text_dialog(self, dialog):
+        """テキスト表示ダイアログを作成、または既存のものを現在のテーマに合わせて再利用"""
+        if dialog is None:
+            return UsageDialog(self)
+        dialog.text_edit.setFont(get_main_font())
+        return dialog
     
     def show_usage(self):
         """使い方を表示"""
         usage_text = tr("usage_content")
         
-        dialog = UsageDialog(self)
+        dialog = self._usage_dialog = self._create_or_reuse_text_dialog(self._usage_dialog)
+        dialog.setWindowTitle(tr("usage_title"))
         dialog.set_usage_text(usage_text)
         dialog.exec()
     
@@ -664,9 +723,11 @@ class MainWindow(QMainWindow):
     
     def show_python_environment(self):
         """Python実行環境の情報を表示"""
+        # Helpメニューからしか使わないため、初回表示時に読み込む
+        from src.core.python_helper import PythonHelper
         env_info = PythonHelper.get_execution_instructions()
         
-        dialog = UsageDialog(self)
+        dialog = self._env_dialog = self._create_or_reuse_text_dialog(self._env_dialog)
         dialog.setWindowTitle(tr("python_env_title"))
         dialog.set_usage_text(env_info)
         dialog.exec()
@@ -697,6 +758,7 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout(dialog)
         
         # プロンプト履歴ウィジェット
+        from src.widgets.prompt_history import PromptHistoryWidget
         history_widget = PromptHistoryWidget(dialog)
         layout.addWidget(history_widget)
         
@@ -737,21 +799,33 @@ class MainWindow(QMainWindow):
         # ダイアログを表示
         dialog.exec()
     
+    @Slot(QAction)
+    def _on_language_action(self, action: QAction):
+        """言語メニューのアクションが選択されたとき"""
+        self.language_manager.set_language(action.data())
+    
+    @Slot(QAction)
+    def _on_theme_action(self, action: QAction):
+        """テーマメニューのアクションが選択されたとき"""
+        self.change_theme(action.data())
+    
+    @Slot(str)
     def change_theme(self, theme_name: str):
         """テーマを変更"""
         # テーママネージャーにテーマを設定
         if theme_manager.set_theme(theme_name):
             # 設定を保存
             self.settings_manager.set_theme(theme_name)
+            self.mark_settings_dirty()
             
             # UIに新しいテーマを適用
             apply_theme(self)
             
             # ステータスバーにメッセージ表示
-            theme_display_names = theme_manager.get_theme_display_names()
-            display_name = theme_display_names.get(theme_name, theme_name)
-            self.statusBar().showMessage(tr("status_theme_changed", theme=display_name), 3000)
+            display_name = self._get_theme_display_names().get(theme_name, theme_name)
+            self._status_bar.showMessage(tr("status_theme_changed", theme=display_name), 3000)
     
+    @Slot()
     def toggle_preview(self):
         """プレビュー表示を切り替え"""
         is_visible = self.preview_action.isChecked()
@@ -759,26 +833,36 @@ class MainWindow(QMainWindow):
         
         # 設定を保存
         self.settings_manager.set_preview_visible(is_visible)
+        self.mark_settings_dirty()
         
         if is_visible:
-            self.statusBar().showMessage(tr("status_preview_shown"), 2000)
+            self._status_bar.showMessage(tr("status_preview_shown"), 2000)
         else:
-            self.statusBar().showMessage(tr("status_preview_hidden"), 2000)
+            self._status_bar.showMessage(tr("status_preview_hidden"), 2000)
     
+    @Slot(int, int)
     def on_splitter_moved(self, _pos: int, _index: int):
         """スプリッターが移動されたとき"""
-        sizes = self.main_splitter.sizes()
-        self.settings_manager.set_splitter_sizes(sizes)
+        # 設定への反映は_flush_splitter_sizes()で操作終了後に1回だけ行う
+        self._pending_splitter_sizes = self.main_splitter.sizes()
+        self._splitter_save_timer.start()
         
-        # 即座に設定を保存（スプリッター変更を確実に保存）
-        self.settings_manager.save_settings()
+        # ファイルツリーとの同期
+        self.sync_file_tree_width()
+    
+    @Slot()
+    def _flush_splitter_sizes(self):
+        """保留中のスプリッターサイズを設定に反映"""
+        self._splitter_save_timer.stop()
+        if self._pending_splitter_sizes is None:
+            return
+        
+        self.settings_manager.set_splitter_sizes(self._pending_splitter_sizes)
+        self._pending_splitter_sizes = None
+        self.mark_settings_dirty()
         
         # 詳細ログ出力
-        logger.info(f"Splitter moved - pos: {_pos}, index: {_index}")
         self.log_splitter_state("User resize")
-        
-        # ファイルツリーとの同期
-        self.sync_file_tree_width()
     
     def center_on_primary_screen(self):
         """ウィンドウをプライマリーモニターの中心に配置"""
@@ -811,13 +895,13 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event: QCloseEvent):
         """ウィンドウが閉じられるとき"""
-        # 設定を保存
-        self.save_window_geometry()
-        self.settings_manager.save_settings()
-        
         # 自動保存タイマーを停止
         self.auto_save_timer.stop()
         
+        # 未保存の変更があれば設定を保存
+        self._flush_splitter_sizes()
+        self.auto_save_settings()
+        
         event.accept()
     
     # インデックス管理メソッド
@@ -933,6 +1017,7 @@ class MainWindow(QMainWindow):
             logger.error(f"Manual index rebuild failed: {e}")
             QMessageBox.critical(self, tr("dialog_error"), tr("startup_optimize_error", error=str(e)))
     
+    @Slot()
     def on_workspace_changed(self):
         """ワークスペース変更時に自動的にインデックスを再構築"""
         # ワークスペースを取得
@@ -948,7 +1033,7 @@ class MainWindow(QMainWindow):
         self.content_search_panel.set_search_paths(workspace_paths)
 
         # ステータスメッセージを表示
-        self.statusBar().showMessage(tr("workspace_changed_message"), 3000)
+        self._status_bar.showMessage(tr("workspace_changed_message"), 3000)
 
         # インデックスを再構築
         self.indexing_manager.start_indexing(workspaces, rebuild_all=True)
@@ -1008,6 +1093,7 @@ class MainWindow(QMainWindow):
         logger.info("起動時: インデックス構築が必要です（手動で「更新」ボタンを押してインデックスを再構築してください）")
     
     # インデックス管理イベントハンドラー
+    @Slot()
     def on_indexing_started(self):
         """インデックス構築開始時"""
         self.indexing_base_text = tr("index_building_progress").rstrip('.')  # 末尾の.を除去
@@ -1019,12 +1105,17 @@ class MainWindow(QMainWindow):
         # アニメーションを開始
         self.indexing_animation_timer.start()
     
+    @Slot(float, str)
     def on_indexing_progress(self, progress: float, message: str):
         """インデックス構築進捗更新時"""
         self.progress_label.setText(message)
     
+    @Slot(dict)
     def on_indexing_completed(self, stats: dict):
         """インデックス構築完了時"""
+        # 索引の内容が変わったため、ワークスペースの検索結果キャッシュを無効化
+        self.workspace_manager.invalidate_trigram_index()
+        
         # アニメーションを停止
         self.indexing_animation_timer.stop()
         self.progress_label.hide()
@@ -1043,8 +1134,9 @@ class MainWindow(QMainWindow):
         
         files = stats.get('total_files_indexed', stats.get('files', 0))
         folders = stats.get('total_folders_indexed', stats.get('folders', 0))
-        self.statusBar().showMessage(tr("index_completed_message", files=files, folders=folders), 3000)
+        self._status_bar.showMessage(tr("index_completed_message", files=files, folders=folders), 3000)
     
+    @Slot(str)
     def on_indexing_failed(self, error_message: str):
         """インデックス構築失敗時"""
         # アニメーションを停止
@@ -1077,7 +1169,7 @@ class MainWindow(QMainWindow):
         self.prompt_input.update_file_searcher(self.fast_searcher)
         
         # ステータスバーに表示
-        self.statusBar().showMessage(tr("message_autocomplete_enabled"), 2000)
+        self._status_bar.showMessage(tr("message_autocomplete_enabled"), 2000)
     
     def update_indexing_animation(self):
         """インデックス構築中アニメーションを更新"""
@@ -1158,9 +1250,15 @@ class MainWindow(QMainWindow):
         logger.info("[DISABLED] _force_splitter_sizes() - preserving user settings")
         return
     
+    def moveEvent(self, event):
+        """ウィンドウ移動時にジオメトリの保存が必要であることを記録"""
+        super().moveEvent(event)
+        self.mark_settings_dirty()
+    
     def resizeEvent(self, event):
         """ウィンドウリサイズ時にスプリッターサイズの比率を維持"""
         super().resizeEvent(event)
+        self.mark_settings_dirty()
         
         try:
             # 新しいウィンドウサイズを取得
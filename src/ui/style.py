@@ -3,48 +3,71 @@ UIスタイル定義モジュール
 - サイバーパンク風のスタイルを提供
 - 全体的なカラースキームとフォント設定
 """
-from PySide6.QtGui import QFont
+import re
+from string import Template
+from types import MappingProxyType
 
-def apply_cyberpunk_style(widget):
-    """サイバーパンク風のスタイルをウィジェットに適用する"""
-    style_sheet = """
+# サイバーパンク配色（各スタイルシートの$名前を置き換えてインポート時に一度だけ生成する）
+_CYBERPUNK_PALETTE = {
+    "bg": "#1a1a2e",
+    "fg": "#ffffff",
+    "accent": "#8a3ffc",
+    "hover": "#007C8A",
+    "focus": "#00FFAA",
+    "selected": "#2980b9",
+    "surface": "#2a2a3e",
+    "surface_alt": "#252540"
+}
+
+# QSSの整形用空白を除去する正規表現（記号の前後の空白と連続する空白）
+_QSS_PUNCT_SPACE_RE = re.compile(r'\s*([{}:;,])\s*')
+_QSS_SPACE_RE = re.compile(r'\s+')
+
+
+def _minify_qss(qss: str) -> str:
+    """QSSから見た目のための空白を取り除く（Qtのパーサーが走査する文字数を減らす）"""
+    return _QSS_PUNCT_SPACE_RE.sub(r'\1', _QSS_SPACE_RE.sub(' ', qss)).strip()
+
+
+# スタイルシートはインポート時に一度だけ作成し、呼び出しごとに同じ文字列を共有する
+_CYBERPUNK_STYLE = _minify_qss(Template("""
     QWidget {
-        background-color: #1a1a2e;
-        color: #ffffff;
+        background-color: $bg;
+        color: $fg;
         font-family: "Segoe UI", Tahoma, Geneva, Verdana, sans-serif;
     }
     QPushButton {
-        background-color: #1a1a2e;
-        border: 1px solid #8a3ffc;
+        background-color: $bg;
+        border: 1px solid $accent;
         border-radius: 8px;
         padding: 10px;
-        color: #ffffff;
+        color: $fg;
         font-size: 14pt;
         min-height: 40px;
         min-width: 100px;
     }
     QPushButton:hover {
-        background-color: #007C8A;
-        border: 1px solid #00FFAA;
+        background-color: $hover;
+        border: 1px solid $focus;
     }
     QPushButton:pressed {
-        background-color: #2980b9;
+        background-color: $selected;
     }
     QLineEdit, QLabel, QSlider, QTextEdit, QComboBox {
-        border: 1px solid #8a3ffc;
+        border: 1px solid $accent;
         font-size: 12pt;
         padding: 5px;
-        background-color: #1a1a2e;
-        color: #ffffff;
+        background-color: $bg;
+        color: $fg;
     }
     QLineEdit:focus, QComboBox:focus {
         background-color: #33334d;
-        border: 1px solid #00FFAA;
+        border: 1px solid $focus;
     }
     QComboBox QAbstractItemView {
-        background-color: #1a1a2e;
-        color: #ffffff;
-        selection-background-color: #007C8A;
+        background-color: $bg;
+        color: $fg;
+        selection-background-color: $hover;
     }
     QSlider::groove:horizontal {
         border: 1px solid #999999;
@@ -59,8 +82,8 @@ def apply_cyberpunk_style(widget):
         background: #2AE6C7;
     }
     QSlider::handle:horizontal {
-        background: #8a3ffc;
-        border: 1px solid #8a3ffc;
+        background: $accent;
+        border: 1px solid $accent;
         width: 22px;
         margin: -6px 0;
         border-radius: 10px;
@@ -82,58 +105,58 @@ def apply_cyberpunk_style(widget):
         border-radius: 10px;
     }
     QTabWidget::pane {
-        border-top: 2px solid #8a3ffc;
+        border-top: 2px solid $accent;
     }
     QTabBar::tab {
-        background: #1a1a2e;
-        color: #ffffff;
+        background: $bg;
+        color: $fg;
         padding: 10px;
         font-size: 12pt;
     }
     QTabBar::tab:hover {
-        background: #007C8A;
-        color: #ffffff;
+        background: $hover;
+        color: $fg;
         padding: 10px;
         font-size: 12pt;
     }
     QTabBar::tab:selected {
-        background-color: #2980b9;
-        border: 1px solid #00FFAA;
+        background-color: $selected;
+        border: 1px solid $focus;
     }
     QListWidget::item:selected {
-        background-color: #007C8A;
-        color: #ffffff;
+        background-color: $hover;
+        color: $fg;
     }
     QTextEdit {
-        border: 1px solid #8a3ffc;
-        background-color: #1a1a2e;
-        color: #ffffff;
+        border: 1px solid $accent;
+        background-color: $bg;
+        color: $fg;
         font-family: "Consolas", "Courier New", monospace;
         font-size: 11pt;
         padding: 10px;
         border-radius: 8px;
     }
     QTextEdit:focus {
-        border: 2px solid #00FFAA;
-        background-color: #252540;
+        border: 2px solid $focus;
+        background-color: $surface_alt;
     }
     QTreeWidget {
-        background-color: #1a1a2e;
-        color: #ffffff;
-        border: 1px solid #8a3ffc;
-        selection-background-color: #007C8A;
-        alternate-background-color: #252540;
+        background-color: $bg;
+        color: $fg;
+        border: 1px solid $accent;
+        selection-background-color: $hover;
+        alternate-background-color: $surface_alt;
     }
     QTreeWidget::item {
         padding: 5px;
-        border-bottom: 1px solid #2a2a3e;
+        border-bottom: 1px solid $surface;
     }
     QTreeWidget::item:hover {
-        background-color: #007C8A;
+        background-color: $hover;
     }
     QTreeWidget::item:selected {
-        background-color: #2980b9;
-        color: #ffffff;
+        background-color: $selected;
+        color: $fg;
     }
     QTreeWidget::branch:has-children:!has-siblings:closed,
     QTreeWidget::branch:closed:has-children:has-siblings {
@@ -155,117 +178,117 @@ def apply_cyberpunk_style(widget):
         border-image: none;
     }
     QHeaderView::section {
-        background-color: #2a2a3e;
-        color: #ffffff;
+        background-color: $surface;
+        color: $fg;
         padding: 5px;
-        border: 1px solid #8a3ffc;
+        border: 1px solid $accent;
         font-weight: bold;
     }
     QScrollBar:vertical {
-        background-color: #1a1a2e;
+        background-color: $bg;
         width: 16px;
         border: none;
     }
     QScrollBar::handle:vertical {
-        background-color: #8a3ffc;
+        background-color: $accent;
         min-height: 20px;
         border-radius: 8px;
     }
     QScrollBar::handle:vertical:hover {
-        background-color: #00FFAA;
+        background-color: $focus;
     }
     QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
         height: 0px;
     }
     QScrollBar:horizontal {
-        background-color: #1a1a2e;
+        background-color: $bg;
         height: 16px;
         border: none;
     }
     QScrollBar::handle:horizontal {
-        background-color: #8a3ffc;
+        background-color: $accent;
         min-width: 20px;
         border-radius: 8px;
     }
     QScrollBar::handle:horizontal:hover {
-        background-color: #00FFAA;
+        background-color: $focus;
     }
     QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal {
         width: 0px;
     }
     QListWidget {
-        background-color: #1a1a2e;
-        color: #ffffff;
-        border: 1px solid #8a3ffc;
+        background-color: $bg;
+        color: $fg;
+        border: 1px solid $accent;
         padding: 5px;
     }
     QListWidget::item {
         padding: 5px;
-        border-bottom: 1px solid #2a2a3e;
+        border-bottom: 1px solid $surface;
     }
     QListWidget::item:hover {
-        background-color: #007C8A;
+        background-color: $hover;
     }
     QListWidget::item:selected {
-        background-color: #2980b9;
-        color: #ffffff;
+        background-color: $selected;
+        color: $fg;
     }
     QMenu {
-        background-color: #1a1a2e;
-        color: #ffffff;
-        border: 1px solid #8a3ffc;
+        background-color: $bg;
+        color: $fg;
+        border: 1px solid $accent;
     }
     QMenu::item {
         padding: 8px 25px;
     }
     QMenu::item:selected {
-        background-color: #007C8A;
+        background-color: $hover;
     }
     QMenuBar {
-        background-color: #1a1a2e;
-        color: #ffffff;
-        border-bottom: 1px solid #8a3ffc;
+        background-color: $bg;
+        color: $fg;
+        border-bottom: 1px solid $accent;
     }
     QMenuBar::item {
         padding: 5px 10px;
     }
     QMenuBar::item:selected {
-        background-color: #007C8A;
+        background-color: $hover;
     }
     QStatusBar {
-        background-color: #1a1a2e;
-        color: #ffffff;
-        border-top: 1px solid #8a3ffc;
+        background-color: $bg;
+        color: $fg;
+        border-top: 1px solid $accent;
     }
     QSplitter::handle {
-        background-color: #8a3ffc;
+        background-color: $accent;
     }
     QSplitter::handle:hover {
-        background-color: #00FFAA;
+        background-color: $focus;
     }
     QToolTip {
-        background-color: #2a2a3e;
-        color: #00FFAA;
-        border: 1px solid #8a3ffc;
+        background-color: $surface;
+        color: $focus;
+        border: 1px solid $accent;
         padding: 5px;
         border-radius: 4px;
         font-size: 10pt;
     }
     QMessageBox {
-        background-color: #1a1a2e;
-        color: #ffffff;
+        background-color: $bg;
+        color: $fg;
     }
     QMessageBox QPushButton {
         min-width: 80px;
         min-height: 30px;
     }
     QFileDialog {
-        background-color: #1a1a2e;
-        color: #ffffff;
+        background-color: $bg;
+        color: $fg;
     }
     QGroupBox {
-        color: #00FFAA;
-        border: 1px solid #8a3ffc;
+        color: $focus;
+        border: 1px solid $accent;
         border-radius: 8px;
         margin-top: 10px;
         padding-top: 10px;
@@ -276,110 +299,154 @@ def apply_cyberpunk_style(widget):
         left: 10px;
         padding: 0 5px 0 5px;
     }
-    """
-    widget.setStyleSheet(style_sheet)
-    
-def get_main_font():
-    """メインフォントを取得"""
-    return QFont("Verdana", 10)
-    
-def get_dialog_style():
-    """ダイアログ用のスタイルを取得"""
-    return {
-        "dialog": """
-            QDialog {
-                background-color: #2b2b2b;
-                color: #ffffff;
-            }
-        """,
-        "ok_button": """
-            QPushButton {
-                background-color: #5cb85c;
-                color: #ffffff;
-                border-radius: 10px;
-                padding: 5px;
-                margin: 4px;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #4f9f4f;
-            }
-            QPushButton:pressed {
-                background-color: #458b45;
-            }
-        """,
-        "cancel_button": """
-            QPushButton {
-                background-color: #d9534f;
-                color: #ffffff;
-                border-radius: 10px;
-                padding: 5px;
-                margin: 4px;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #c94c4c;
-            }
-            QPushButton:pressed {
-                background-color: #b43c3c;
-            }
-        """
-    }
-    
-def get_drag_drop_style(active=False):
-    """ドラッグ＆ドロップ領域のスタイルを取得"""
-    if active:
-        return """
+    """).substitute(_CYBERPUNK_PALETTE))
+
+# ドラッグ＆ドロップ領域のスタイル（アクティブ時／非アクティブ時）
+_DRAG_ACTIVE_STYLE = _minify_qss(Template("""
             QLabel {
-                border: 3px solid #00FFAA;
+                border: 3px solid $focus;
                 padding: 20px;
-                color: #00FFAA;
+                color: $focus;
                 font-size: 14pt;
                 background-color: rgba(0, 255, 170, 0.2);
                 font-weight: bold;
                 border-radius: 8px;
             }
-        """
-    else:
-        return """
+        """).substitute(_CYBERPUNK_PALETTE))
+
+_DRAG_INACTIVE_STYLE = _minify_qss(Template("""
             QLabel {
-                border: 2px dashed #8a3ffc;
+                border: 2px dashed $accent;
                 padding: 20px;
-                color: #8a3ffc;
+                color: $accent;
                 font-size: 14pt;
                 background-color: rgba(138, 63, 252, 0.05);
                 border-radius: 8px;
             }
-        """
+        """).substitute(_CYBERPUNK_PALETTE))
 
-def get_completion_widget_style():
-    """ファイル補完ウィジェットのスタイルを取得"""
-    return """
+# ダイアログ用のスタイル（呼び出し側はモジュール属性として直接参照できる）
+DIALOG_QSS = _minify_qss("""
+    QDialog {
+        background-color: #2b2b2b;
+        color: #ffffff;
+    }
+""")
+
+OK_BUTTON_QSS = _minify_qss("""
+    QPushButton {
+        background-color: #5cb85c;
+        color: #ffffff;
+        border-radius: 10px;
+        padding: 5px;
+        margin: 4px;
+        border: none;
+    }
+    QPushButton:hover {
+        background-color: #4f9f4f;
+    }
+    QPushButton:pressed {
+        background-color: #458b45;
+    }
+""")
+
+CANCEL_BUTTON_QSS = _minify_qss("""
+    QPushButton {
+        background-color: #d9534f;
+        color: #ffffff;
+        border-radius: 10px;
+        padding: 5px;
+        margin: 4px;
+        border: none;
+    }
+    QPushButton:hover {
+        background-color: #c94c4c;
+    }
+    QPushButton:pressed {
+        background-color: #b43c3c;
+    }
+""")
+
+# get_dialog_style()用の読み取り専用マッピング（後方互換性のため）
+_DIALOG_STYLE = MappingProxyType({
+    "dialog": DIALOG_QSS,
+    "ok_button": OK_BUTTON_QSS,
+    "cancel_button": CANCEL_BUTTON_QSS
+})
+
+# メインフォント（get_main_font()の初回呼び出し時に作成）
+_MAIN_FONT = None
+
+_COMPLETION_WIDGET_STYLE = _minify_qss(Template("""
         QWidget {
-            background-color: #2a2a3e;
-            border: 2px solid #8a3ffc;
+            background-color: $surface;
+            border: 2px solid $accent;
             border-radius: 8px;
         }
         QLabel {
-            color: #00FFAA;
+            color: $focus;
             font-weight: bold;
             padding: 5px;
         }
         QListWidget {
-            background-color: #1a1a2e;
-            color: #ffffff;
+            background-color: $bg;
+            color: $fg;
             border: none;
             outline: none;
         }
         QListWidget::item {
             padding: 8px;
-            border-bottom: 1px solid #2a2a3e;
+            border-bottom: 1px solid $surface;
         }
         QListWidget::item:hover {
-            background-color: #007C8A;
+            background-color: $hover;
         }
         QListWidget::item:selected {
-            background-color: #2980b9;
-            color: #ffffff;
+            background-color: $selected;
+            color: $fg;
         }
-    """ 
\ No newline at end of file
+    """).substitute(_CYBERPUNK_PALETTE)) 
+
+
+def apply_cyberpunk_style(widget):
+    """
+    サイバーパンク風のスタイルをウィジェットに適用する
+    
+    トップレベルウィンドウの場合はアプリケーション全体に一度だけ設定し、
+    解析済みのスタイルを全ウィジェットで共有する（子ウィジェットごとの再解析を避ける）。
+    """
+    from PySide6.QtWidgets import QApplication
+    
+    app = QApplication.instance()
+    if app is not None and widget.isWindow():
+        if app.styleSheet() != _CYBERPUNK_STYLE:
+            app.setStyleSheet(_CYBERPUNK_STYLE)
+        return
+    # 同じスタイルが設定済みなら再適用しない（子ウィジェット全体の再polishを避ける）
+    if widget.styleSheet() != _CYBERPUNK_STYLE:
+        widget.setStyleSheet(_CYBERPUNK_STYLE)
+    
+def get_main_font():
+    """
+    メインフォントを取得
+    
+    初回呼び出し時に作成したインスタンスを共有する。
+    変更して使う場合は QFont(get_main_font()) でコピーすること。
+    """
+    global _MAIN_FONT
+    if _MAIN_FONT is None:
+        from PySide6.QtGui import QFont
+        _MAIN_FONT = QFont("Verdana", 10)
+    return _MAIN_FONT
+    
+def get_dialog_style():
+    """ダイアログ用のスタイルを取得（読み取り専用の共有マッピング）"""
+    return _DIALOG_STYLE
+    
+def get_drag_drop_style(active=False):
+    """ドラッグ＆ドロップ領域のスタイルを取得"""
+    return _DRAG_ACTIVE_STYLE if active else _DRAG_INACTIVE_STYLE
+
+def get_completion_widget_style():
+    """ファイル補完ウィジェットのスタイルを取得"""
+    return _COMPLETION_WIDGET_STYLE
\ No newline at end of file
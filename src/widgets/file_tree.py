@@ -420,6 +420,8 @@ class FileTreeWidget(QWidget):
     
     def rebuild_index(self):
         """インデックスを再構築"""
+        # フォールバック検索用の索引も破棄してディスクの変更を反映
+        self.workspace_manager.invalidate_trigram_index()
         # インデックス再構築の信号を発信
         self.workspace_changed.emit()
         # ツリーも再読み込み